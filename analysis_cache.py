@@ -0,0 +1,53 @@
+import hashlib
+import os
+import threading
+import gemini_client
+import model_registry
+import response_cache
+
+# --- SETTINGS ---
+ANALYSIS_CACHE_PATH = os.path.join('cache', 'analysis.db')
+ANALYSIS_CACHE_TTL_SECONDS = 30 * 24 * 3600
+ANALYSIS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Open the analysis cache on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = response_cache.ResponseCache(
+                ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_TTL_SECONDS, ANALYSIS_CACHE_MAX_BYTES
+            )
+        return _cache
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    """Key for one model call: model, prompt hash and generation config."""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    return response_cache.make_key('analysis', model_name, prompt_hash, model_registry.config_key(generation_config))
+
+
+def generate_text(prompt, model_name=model_registry.DEFAULT_MODEL, generation_config=None, tag=None):
+    """Response text for prompt, from the cache when the same call was made before.
+
+    tag (a quiz id) lets invalidate() drop every cached analysis of one quiz.
+    Errors are raised and never cached.
+    """
+    cache = get_cache()
+    key = cache_key(model_name, prompt, generation_config)
+    text = cache.get(key)
+    if text is not None:
+        print(f"✅ AI analysis served from cache ({key[:12]})")
+        return text
+    text = gemini_client.generate_content(model_name, prompt, generation_config).text
+    cache.set(key, text, tag=tag)
+    return text
+
+
+def invalidate(tag):
+    """Forget cached analyses stored with tag; returns how many were dropped."""
+    return get_cache().delete_tag(tag)
@@ -1,12 +1,23 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, make_response, request, send_file, stream_with_context
+import functools
 import json
 import os
-import re
+import threading
 from datetime import datetime
 from flask_cors import CORS
-import google.generativeai as genai
 from werkzeug.utils import secure_filename
-import generate_report
+import analysis_cache
+import extraction
+import gemini_client
+import quiz_pool
+import quiz_schema
+import quiz_sharding
+import quiz_store
+import quiz_stream
+import report_jobs
+import response_cache
+import single_flight
+import uploads
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -15,26 +26,86 @@ CORS(app)  # Enable CORS for all routes
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'txt', 'docx', 'doc', 'pptx', 'ppt', 'xls', 'xlsx', 'csv', 'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'ico', 'webp'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Reject oversized request bodies before reading them (uploads are also capped while spooling)
+app.config['MAX_CONTENT_LENGTH'] = uploads.MAX_UPLOAD_BYTES + 1024 * 1024
 
 # Create uploads directory if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Generated quiz cache (content-addressed, see quiz_cache_key)
+QUIZ_CACHE_PATH = os.path.join('cache', 'quizzes.db')
+QUIZ_CACHE_TTL_SECONDS = 7 * 24 * 3600
+QUIZ_CACHE_MAX_BYTES = 256 * 1024 * 1024
+QUIZ_CACHE_MODES = ('use', 'bypass', 'refresh')
+_quiz_cache = None
+_quiz_cache_lock = threading.Lock()
+
+def get_quiz_cache():
+    """Open the quiz cache on first use, so importing backend creates no files."""
+    global _quiz_cache
+    with _quiz_cache_lock:
+        if _quiz_cache is None:
+            _quiz_cache = response_cache.ResponseCache(QUIZ_CACHE_PATH, QUIZ_CACHE_TTL_SECONDS, QUIZ_CACHE_MAX_BYTES)
+        return _quiz_cache
+
+# Per-endpoint concurrency limits, so slow Gemini calls can't take every server
+# thread and starve the health and job-status endpoints (see serve.py THREADS)
+ENDPOINT_LIMITS = {'quiz': 24, 'report': 8}
+LIMIT_WAIT_SECONDS = 2
+_limit_semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in ENDPOINT_LIMITS.items()}
+_limit_in_use = {name: 0 for name in ENDPOINT_LIMITS}
+_limit_lock = threading.Lock()
+
+def _release_limit(group):
+    with _limit_lock:
+        _limit_in_use[group] -= 1
+    _limit_semaphores[group].release()
+
+def limit_concurrency(group):
+    """Allow at most ENDPOINT_LIMITS[group] concurrent requests; others get 503.
+
+    Streamed responses hold their slot until the stream is closed.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not _limit_semaphores[group].acquire(timeout=LIMIT_WAIT_SECONDS):
+                response = jsonify({'error': f'Server is busy ({group} requests at capacity), try again shortly'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            with _limit_lock:
+                _limit_in_use[group] += 1
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                _release_limit(group)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: _release_limit(group))
+            else:
+                _release_limit(group)
+            return response
+        return wrapper
+    return decorator
+
+def concurrency_stats():
+    with _limit_lock:
+        return {name: {'limit': ENDPOINT_LIMITS[name], 'in_use': _limit_in_use[name]} for name in ENDPOINT_LIMITS}
+
+# Set when the server is shutting down: /ready then fails so load balancers stop routing here
+_draining = threading.Event()
+
+def start_draining():
+    _draining.set()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def generate(prompt, num_quizzes, questions=None, pdf_path=None):
-    try:
-        # Load API key from configuration file
-        with open('classroom-ai.json', 'r') as f:
-            config = json.load(f)
-        
-        # Configure Gemini API
-        genai.configure(api_key=config['gemini_api_key'])
-        
-        # Initialize Gemini Pro Model
-        model = genai.GenerativeModel('gemini-2.5-pro')
-        
-        system_prompt = """You are Dr. Sarah Chen, an expert educational psychologist and assessment specialist with 15 years of experience in curriculum development and learning analytics. You specialize in creating engaging, pedagogically sound assessments that promote deep learning and critical thinking.
+# Bump whenever SYSTEM_PROMPT, the prompt template or the material sent with it changes,
+# so cached quizzes produced by an older prompt are not served
+SYSTEM_PROMPT_VERSION = 2
+
+SYSTEM_PROMPT = """You are Dr. Sarah Chen, an expert educational psychologist and assessment specialist with 15 years of experience in curriculum development and learning analytics. You specialize in creating engaging, pedagogically sound assessments that promote deep learning and critical thinking.
 
 ## TASK
 Generate high-quality multiple-choice quiz questions that effectively assess student understanding of the given lecture content. Each question should test different cognitive levels (recall, comprehension, application, analysis) and provide meaningful learning opportunities through well-crafted explanations.
@@ -78,8 +149,36 @@ Before generating each question, think through:
 - Does this question contribute to deeper understanding?
 """
 
-        # Prepare content parts with chain of thought reasoning
-        prompt_text = f"""Generate {num_quizzes} high-quality quiz questions for the lecture content: {prompt}
+def quiz_cache_key(prompt, num_quizzes, questions=None, file_hash=None):
+    """Cache key for a generated quiz: every input that changes the model's output."""
+    return response_cache.make_key('quiz', SYSTEM_PROMPT_VERSION, prompt, num_quizzes, questions or None, file_hash)
+
+# Generation settings for quiz requests (part of the shared model's registry key).
+# A plain dict, so importing backend doesn't load google.generativeai
+QUIZ_GENERATION_CONFIG = {
+    'temperature': 0.5,
+    'top_p': 0.95,
+    'max_output_tokens': 8192,
+    # Structured output: the model is constrained to the format.JSON schema
+    'response_mime_type': 'application/json',
+    'response_schema': quiz_schema.GEMINI_RESPONSE_SCHEMA,
+}
+# Extra calls generate() makes for questions that failed validation
+QUIZ_REPAIR_ROUNDS = 2
+# Largest quiz one request may ask for (each quiz_sharding.SHARD_SIZE questions is a model call)
+MAX_QUIZ_QUESTIONS = 100
+
+def parse_num_quizzes(value):
+    """num_quizzes from a request as an int; raises ValueError unless 1 <= n <= MAX_QUIZ_QUESTIONS."""
+    num_quizzes = int(value)
+    if not 1 <= num_quizzes <= MAX_QUIZ_QUESTIONS:
+        raise ValueError(f'num_quizzes must be between 1 and {MAX_QUIZ_QUESTIONS}')
+    return num_quizzes
+
+def build_quiz_prompt(prompt, num_quizzes, questions=None, focus=None):
+    """Full text prompt (system prompt plus task) for a quiz of num_quizzes questions."""
+    # Prepare content parts with chain of thought reasoning
+    prompt_text = f"""Generate {num_quizzes} high-quality quiz questions for the lecture content: {prompt}
 
 ## QUESTION DESIGN PROCESS
 For each question, ensure:
@@ -110,52 +209,174 @@ IMPORTANT: Return ONLY the JSON array. No additional text, explanations, or comm
 ## CONTENT INTEGRATION
 If student questions were provided, incorporate those concepts and address any knowledge gaps they reveal.
 """
-        
-        if questions:
-            prompt_text += f"\n\n## STUDENT QUESTIONS TO ADDRESS\n{questions}\n\nEnsure your questions cover these concepts and address any misconceptions revealed in the student questions."
-        
-        # Create the full prompt with system instruction
-        full_prompt = f"{system_prompt}\n\n{prompt_text}"
-        
-        # Add PDF content if provided
-        generation_config = genai.types.GenerationConfig(
-            temperature=0.5,
-            top_p=0.95,
-            max_output_tokens=8192,
-        )
-        
-        # Generate content
-        if pdf_path and os.path.exists(pdf_path):
-            with open(pdf_path, 'rb') as pdf_file:
-                pdf_content = pdf_file.read()
-                response = model.generate_content(
-                    [full_prompt, {"mime_type": "application/pdf", "data": pdf_content}],
-                    generation_config=generation_config
-                )
-        else:
-            response = model.generate_content(
-                full_prompt,
-                generation_config=generation_config
-            )
+    
+    if questions:
+        prompt_text += f"\n\n## STUDENT QUESTIONS TO ADDRESS\n{questions}\n\nEnsure your questions cover these concepts and address any misconceptions revealed in the student questions."
+    
+    if focus:
+        # Set by sharded generation: this request covers one slice of a larger quiz
+        prompt_text += f"\n\n## FOCUS FOR THIS SET\n{focus}"
 
-        response_text = response.text
-        
-        # Try to extract JSON if the response contains extra text
-        import re
-        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(0)
-        
-        return response_text
+    # Create the full prompt with system instruction
+    return f"{SYSTEM_PROMPT}\n\n{prompt_text}"
+
+def quiz_contents(full_prompt, upload=None, query=''):
+    """Content parts for generate_content: the prompt plus the uploaded material, if any.
+
+    Text is extracted locally where possible and only the excerpts relevant to query
+    are sent; other files (images, scanned PDFs, legacy Office formats) are sent whole.
+    """
+    if upload is None:
+        return full_prompt
+    excerpts = extraction.relevant_text(upload, query)
+    if excerpts is not None:
+        return f"{full_prompt}\n\n## LECTURE MATERIAL (relevant excerpts from {upload.filename})\n{excerpts}"
+    return [full_prompt, uploads.model_part(upload)]
+
+def material_query(prompt, questions=None):
+    """Text used to pick the relevant parts of uploaded material."""
+    return f"{prompt}\n{questions or ''}"
+
+def generate(prompt, num_quizzes, questions=None, upload=None, focus=None):
+    # Large quizzes are split into concurrent smaller calls, which are faster and
+    # stay well inside max_output_tokens (see quiz_sharding)
+    if num_quizzes > quiz_sharding.SHARD_SIZE:
+        try:
+            merged = quiz_sharding.generate_sharded(generate, prompt, num_quizzes, questions, upload)
+        except Exception as e:
+            raise Exception(f"Error in sharded generation: {str(e)}")
+        return json.dumps(merged, ensure_ascii=False)
+
+    contents_query = material_query(prompt, questions)
+    quiz_questions = []
+    try:
+        for attempt in range(1 + QUIZ_REPAIR_ROUNDS):
+            missing = num_quizzes - len(quiz_questions)
+            request_focus = focus
+            if quiz_questions:
+                # Only the questions that failed validation are asked for again
+                kept = "\n".join(f"- {q['question']}" for q in quiz_questions)
+                request_focus = f"{focus or ''}\nAvoid repeating any of these existing questions:\n{kept}".strip()
+            full_prompt = build_quiz_prompt(prompt, missing, questions, request_focus)
 
+            # Rate-limited, retried call on the shared Gemini client (see gemini_client)
+            response = gemini_client.generate_content(
+                'gemini-2.5-pro', quiz_contents(full_prompt, upload, contents_query), QUIZ_GENERATION_CONFIG
+            )
+
+            # Structured output should be a bare JSON array; the stream parser also salvages
+            # the complete questions of a truncated or fenced response
+            parser = quiz_stream.JSONArrayStreamParser()
+            valid, invalid = quiz_schema.split_valid(parser.feed(response.text))
+            quiz_questions.extend(valid[:missing])
+            failed = len(invalid) + len(parser.malformed)
+            if failed or len(valid) < missing:
+                print(f"WARNING: {failed} invalid and {max(0, missing - len(valid) - failed)} missing "
+                      f"questions in attempt {attempt + 1}")
+            if len(quiz_questions) >= num_quizzes:
+                break
     except Exception as e:
         raise Exception(f"Error in generate function: {str(e)}")
 
+    if not quiz_questions:
+        raise Exception("Error in generate function: the model returned no valid questions")
+    if len(quiz_questions) < num_quizzes:
+        print(f"WARNING: Returning {len(quiz_questions)} of {num_quizzes} questions after {QUIZ_REPAIR_ROUNDS} repair rounds")
+    return json.dumps(quiz_questions, ensure_ascii=False)
+
+# Quiz generations currently running, keyed by quiz_flight_key
+quiz_flights = single_flight.SingleFlight()
+
+def normalize_text(text):
+    """Text with runs of whitespace collapsed, so trivially different inputs share a key."""
+    return ' '.join(text.split()) if text else None
+
+def quiz_flight_key(prompt, num_quizzes, questions=None, file_hash=None):
+    """Key under which concurrent identical quiz requests are coalesced."""
+    return quiz_cache_key(normalize_text(prompt), num_quizzes, normalize_text(questions), file_hash)
+
+def generate_parsed(prompt, num_quizzes, questions=None, upload=None):
+    """(raw response text, parsed questions or None if the text isn't valid JSON)."""
+    result = generate(prompt, num_quizzes, questions, upload)
+    try:
+        return result, json.loads(result)
+    except json.JSONDecodeError:
+        return result, None
+
+# Background-filled question banks per lecture topic
+quiz_pools = quiz_pool.QuizPools(generate)
+
+class InvalidUploadError(Exception):
+    """Raised for uploads with a missing name, a disallowed extension or an oversized body."""
+
+def save_uploaded_file():
+    """Spool the request's 'file' upload into UPLOAD_FOLDER.
+
+    Returns an uploads.SpooledUpload (hashed while streaming), or None if there is
+    no file. The caller removes it once the model call is done.
+    """
+    if 'file' not in request.files:
+        return None
+    file = request.files['file']
+    if not file or not allowed_file(file.filename):
+        raise InvalidUploadError('Invalid file type.')
+    file.filename = secure_filename(file.filename)
+    try:
+        return uploads.spool_upload(file, app.config['UPLOAD_FOLDER'])
+    except uploads.UploadTooLargeError as e:
+        raise InvalidUploadError(str(e))
+
+def save_quiz_response(prompt, num_quizzes, questions, quiz_questions, class_id=None):
+    """Store the quiz in the quiz store for report generation and return its id."""
+    quiz_id = quiz_store.save_quiz(prompt, num_quizzes, questions, quiz_questions, class_id)
+    print(f"✅ Quiz saved to quiz store ({quiz_id})")
+    return quiz_id
+
+def grade_answers(quiz_questions, student_answers):
+    """Compare answers ({"1": "b", ...}, numbered from 1) with the quiz's correct options."""
+    results = []
+    for idx, q in enumerate(quiz_questions):
+        correct = q.get('correct')
+        student_answer = student_answers.get(str(idx + 1)) if isinstance(student_answers, dict) else None
+        results.append({
+            "question": q.get('question'),
+            "student_answer": student_answer,
+            "correct_answer": correct,
+            "is_correct": student_answer == correct
+        })
+    return results
+
+def save_student_results(quiz_id, student_id, quiz_questions, student_answers):
+    """Grade a student's answers and store them in the quiz store's results table."""
+    results = grade_answers(quiz_questions, student_answers)
+    quiz_store.save_results(quiz_id, student_id, results)
+    print(f"✅ Student quiz result saved for {student_id} ({quiz_id})")
+    return results
+
 @app.route('/', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'Backend is running', 'message': 'Server is healthy'})
+    return jsonify({
+        'status': 'Backend is running',
+        'message': 'Server is healthy',
+        'quiz_cache': get_quiz_cache().stats(),
+        'concurrency': concurrency_stats(),
+        'gemini': gemini_client.stats(),
+        'quiz_flights': quiz_flights.in_flight()
+    })
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """200 once the server can take traffic; 503 while draining or if the quiz store is unusable."""
+    if _draining.is_set():
+        return jsonify({'ready': False, 'reason': 'draining'}), 503
+    try:
+        quiz_store.connect().close()
+    except Exception as e:
+        return jsonify({'ready': False, 'reason': f'quiz store unavailable: {e}'}), 503
+    return jsonify({'ready': True})
 
 @app.route('/generate-quiz', methods=['POST'])
+@limit_concurrency('quiz')
 def generate_quiz():
     try:
         # Handle text data
@@ -164,53 +385,66 @@ def generate_quiz():
             return jsonify({'error': 'Missing prompt or num_quizzes in request'}), 400
 
         prompt = data['prompt']
-        num_quizzes = int(data['num_quizzes'])
+        num_quizzes = parse_num_quizzes(data['num_quizzes'])
         
         # Read questions if provided (treating it as a simple string)
         questions = None
         if 'questions' in data:
             questions = data['questions']
 
+        # Cache control: 'bypass' skips the quiz cache, 'refresh' regenerates and overwrites the entry
+        cache_mode = data.get('cache', 'use')
+        if cache_mode not in QUIZ_CACHE_MODES:
+            return jsonify({'error': f"Invalid cache mode '{cache_mode}'. Use one of: {', '.join(QUIZ_CACHE_MODES)}."}), 400
+
         # Handle PDF file if uploaded
-        pdf_path = None
-        if 'file' in request.files:
-            file = request.files['file']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(pdf_path)
-            else:
-                return jsonify({'error': 'Invalid file type.'}), 400
+        try:
+            upload = save_uploaded_file()
+        except InvalidUploadError as e:
+            return jsonify({'error': str(e)}), 400
         
-        print(f"PDF path: {pdf_path}")
+        print(f"Upload: {upload.filename + f' ({upload.size} bytes)' if upload else None}")
         print(f"Prompt: {prompt}")
         print(f"Number of quizzes: {num_quizzes}")
         
         try:
-            result = generate(prompt, num_quizzes, questions, pdf_path)
-            # Clean up uploaded file if it exists
-            if pdf_path and os.path.exists(pdf_path):
-                os.remove(pdf_path)
+            cache_key = quiz_cache_key(prompt, num_quizzes, questions, upload.sha256 if upload else None)
+            quiz_cache = get_quiz_cache()
+            result = None
+            parsed_result = None
+            from_pool = False
+            if cache_mode == 'use' and upload is None and not questions:
+                # A pre-generated question bank for this topic answers instantly (see quiz_pool)
+                parsed_result = quiz_pools.draw(prompt, num_quizzes)
+                from_pool = parsed_result is not None
+            if not from_pool and cache_mode == 'use':
+                result = quiz_cache.get(cache_key)
+            from_cache = result is not None
+            if from_pool:
+                result = json.dumps(parsed_result, ensure_ascii=False)
+                print(f"✅ Quiz drawn from the question pool for '{prompt}'")
+            elif from_cache:
+                print(f"✅ Quiz served from cache ({cache_key[:12]})")
+            else:
+                # Identical requests arriving together (a class opening the same link) share one call
+                flight_key = quiz_flight_key(prompt, num_quizzes, questions, upload.sha256 if upload else None)
+                (result, parsed_result), shared = quiz_flights.do(
+                    flight_key, generate_parsed, prompt, num_quizzes, questions, upload
+                )
+                if shared:
+                    print(f"✅ Quiz shared with an identical in-flight request ({flight_key[:12]})")
             
             # Debug: Print the raw response
             print(f"Raw AI response: {result}")
             
             # Try to parse JSON
             try:
-                parsed_result = json.loads(result)
-                # Save quiz response to JSON file for report generation
-                quiz_data = {
-                    "prompt": prompt,
-                    "num_quizzes": num_quizzes,
-                    "questions": questions,
-                    "quiz_questions": parsed_result,
-                    "timestamp": datetime.now().isoformat()
-                }
-                with open("quiz_response.json", "w", encoding="utf-8") as f:
-                    json.dump(quiz_data, f, indent=2, ensure_ascii=False)
-                    f.flush()
-                    os.fsync(f.fileno())
-                print(f"✅ Quiz response saved to quiz_response.json (flushed)")
+                if parsed_result is None:
+                    parsed_result = json.loads(result)
+                if not from_cache and not from_pool and cache_mode != 'bypass':
+                    quiz_cache.set(cache_key, result)
+                # Save the quiz for report generation
+                quiz_id = save_quiz_response(prompt, num_quizzes, questions, parsed_result, data.get('class_id'))
 
                 # --- NEW: Save student quiz result (correct/wrong) ---
                 # Expecting student answers in the request (as JSON string or dict)
@@ -224,34 +458,15 @@ def generate_quiz():
                         print(f"Could not parse student_answers: {e}")
 
                 if student_answers:
-                    # Compare student answers to correct answers
-                    student_result = {
-                        "student_id": data.get('student_id', f"student_{datetime.now().strftime('%Y%m%d%H%M%S')}")
-                    }
-                    results = []
-                    for idx, q in enumerate(parsed_result):
-                        qid = str(idx+1)
-                        correct = q.get('correct')
-                        student_answer = student_answers.get(qid) if isinstance(student_answers, dict) else None
-                        results.append({
-                            "question": q.get('question'),
-                            "student_answer": student_answer,
-                            "correct_answer": correct,
-                            "is_correct": student_answer == correct
-                        })
-                    student_result['results'] = results
-                    # Save to a uniquely named file
-                    student_id = student_result['student_id']
-                    student_file = f"student_response_{student_id}.json"
-                    with open(student_file, "w", encoding="utf-8") as sf:
-                        json.dump(student_result, sf, indent=2, ensure_ascii=False)
-                        sf.flush()
-                        os.fsync(sf.fileno())
-                    print(f"✅ Student quiz result saved to {student_file}")
+                    student_id = data.get('student_id', f"student_{datetime.now().strftime('%Y%m%d%H%M%S')}")
+                    save_student_results(quiz_id, student_id, parsed_result, student_answers)
 
                 return jsonify({
                     "quiz_questions": parsed_result,
-                    "raw_response": result
+                    "raw_response": result,
+                    "cached": from_cache,
+                    "pooled": from_pool,
+                    "quiz_id": quiz_id
                 })
 
             except json.JSONDecodeError as e:
@@ -260,26 +475,242 @@ def generate_quiz():
                 return jsonify({'error': f'Invalid JSON response from AI. Raw response: {result[:200]}...'}), 500
         except Exception as e:
             return jsonify({'error': f'Error in generate function: {str(e)}'}), 500
+        finally:
+            # Clean up uploaded file if it exists
+            if upload:
+                upload.remove()
     
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
+def ndjson_line(event):
+    return json.dumps(event, ensure_ascii=False) + '\n'
+
+def chunk_text(chunk):
+    """Text of one streamed response chunk ('' for chunks without text, e.g. the final one)."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+@app.route('/generate-quiz/stream', methods=['POST'])
+@limit_concurrency('quiz')
+def generate_quiz_stream():
+    """Stream quiz questions as NDJSON, one line per question as soon as the model closes it.
+
+    Lines are {"type": "question", "index": n, "question": {...}} for questions that
+    pass the format.JSON schema, {"type": "invalid", ...} for ones that don't, then a
+    final {"type": "done", "count": n, "quiz_id": ...} or {"type": "error", "error": "..."}.
+    """
+    data = request.form
+    if not data or 'prompt' not in data or 'num_quizzes' not in data:
+        return jsonify({'error': 'Missing prompt or num_quizzes in request'}), 400
+    prompt = data['prompt']
+    try:
+        num_quizzes = parse_num_quizzes(data['num_quizzes'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    questions = data.get('questions')
+    class_id = data.get('class_id')
+    cache_mode = data.get('cache', 'use')
+    if cache_mode not in QUIZ_CACHE_MODES:
+        return jsonify({'error': f"Invalid cache mode '{cache_mode}'. Use one of: {', '.join(QUIZ_CACHE_MODES)}."}), 400
+    try:
+        upload = save_uploaded_file()
+    except InvalidUploadError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def events():
+        try:
+            cache_key = quiz_cache_key(prompt, num_quizzes, questions, upload.sha256 if upload else None)
+            quiz_cache = get_quiz_cache()
+            cached = quiz_cache.get(cache_key) if cache_mode == 'use' else None
+            if cached is not None:
+                quiz_questions = json.loads(cached)
+                for index, question in enumerate(quiz_questions):
+                    yield ndjson_line({'type': 'question', 'index': index, 'question': question})
+                quiz_id = save_quiz_response(prompt, num_quizzes, questions, quiz_questions, class_id)
+                yield ndjson_line({'type': 'done', 'count': len(quiz_questions), 'cached': True, 'quiz_id': quiz_id})
+                return
+
+            # Streams share the quota, in-flight limit and backoff of every other Gemini call
+            response = gemini_client.generate_content_stream(
+                'gemini-2.5-pro',
+                quiz_contents(build_quiz_prompt(prompt, num_quizzes, questions), upload, material_query(prompt, questions)),
+                QUIZ_GENERATION_CONFIG
+            )
+            parser = quiz_stream.JSONArrayStreamParser()
+            quiz_questions = []
+            invalid = 0
+            for chunk in response:
+                for question in parser.feed(chunk_text(chunk)):
+                    question = quiz_schema.repair_question(question)
+                    errors = quiz_schema.question_errors(question)
+                    if errors:
+                        invalid += 1
+                        yield ndjson_line({'type': 'invalid', 'question': question, 'errors': errors})
+                        continue
+                    yield ndjson_line({'type': 'question', 'index': len(quiz_questions), 'question': question})
+                    quiz_questions.append(question)
+                for text in parser.malformed:
+                    invalid += 1
+                    yield ndjson_line({'type': 'invalid', 'raw': text, 'errors': ['Malformed JSON object']})
+                parser.malformed.clear()
+
+            quiz_id = None
+            if quiz_questions:
+                quiz_id = save_quiz_response(prompt, num_quizzes, questions, quiz_questions, class_id)
+                # Only complete, fully valid quizzes are reused by /generate-quiz
+                if not invalid and parser.finished and cache_mode != 'bypass':
+                    quiz_cache.set(cache_key, json.dumps(quiz_questions, ensure_ascii=False))
+            yield ndjson_line({'type': 'done', 'count': len(quiz_questions), 'cached': False, 'quiz_id': quiz_id})
+        except Exception as e:
+            yield ndjson_line({'type': 'error', 'error': f'Error in generate function: {str(e)}'})
+        finally:
+            if upload:
+                upload.remove()
+
+    return Response(stream_with_context(events()), mimetype='application/x-ndjson')
+
 @app.route('/generate-report', methods=['POST'])
+@limit_concurrency('report')
 def generate_report_endpoint():
+    # quiz_id picks a stored quiz (form, JSON body or query string); default is the latest
+    body = request.get_json(silent=True) or {}
+    quiz_id = request.form.get('quiz_id') or body.get('quiz_id') or request.args.get('quiz_id')
     try:
-        generate_report.generate_report()
-        return jsonify({'success': True, 'message': 'Report generated successfully'}), 200
+        job = report_jobs.submit(quiz_id=quiz_id)
+        return jsonify({
+            'success': True,
+            'message': 'Report generation queued',
+            'job_id': job['id'],
+            'quiz_id': job['quiz_id'],
+            'status': job['status'],
+            'status_url': f"/jobs/{job['id']}"
+        }), 202
+    except report_jobs.MissingInputError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except report_jobs.QueueFullError as e:
+        return jsonify({'success': False, 'error': f'Report queue is full, try again shortly ({e})'}), 503
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def job_response(job):
+    return {
+        'job_id': job['id'],
+        'quiz_id': job['quiz_id'],
+        'status': job['status'],
+        'error': job['error'],
+        'cancel_requested': job['cancel_requested'],
+        'created_at': datetime.fromtimestamp(job['created_at']).isoformat(),
+        'finished_at': datetime.fromtimestamp(job['finished_at']).isoformat() if job['finished_at'] else None,
+        'download_url': f"/download/report?job_id={job['id']}" if job['status'] == report_jobs.SUCCEEDED else None
+    }
+
+@app.route('/quizzes', methods=['GET'])
+def list_quizzes():
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'quizzes': quiz_store.list_quizzes(request.args.get('class_id'), limit)})
+
+@app.route('/quizzes/<quiz_id>', methods=['GET'])
+def get_quiz(quiz_id):
+    quiz = quiz_store.get_quiz(quiz_id)
+    if quiz is None:
+        return jsonify({'error': 'Quiz not found'}), 404
+    return jsonify(quiz)
+
+@app.route('/quizzes/<quiz_id>/analysis', methods=['DELETE'])
+def invalidate_quiz_analysis(quiz_id):
+    """Drop the cached Gemini report analyses of a quiz so the next report asks again."""
+    removed = analysis_cache.invalidate(quiz_id)
+    return jsonify({'quiz_id': quiz_id, 'invalidated': removed})
+
+@app.route('/quizzes/<quiz_id>/results', methods=['POST'])
+def submit_results(quiz_id):
+    """Grade and store one student's answers to a stored quiz."""
+    quiz = quiz_store.get_quiz(quiz_id)
+    if quiz is None:
+        return jsonify({'error': 'Quiz not found'}), 404
+    data = request.get_json(silent=True) or request.form
+    student_answers = data.get('student_answers')
+    if isinstance(student_answers, str):
+        try:
+            student_answers = json.loads(student_answers)
+        except json.JSONDecodeError as e:
+            return jsonify({'error': f'Could not parse student_answers: {e}'}), 400
+    if not isinstance(student_answers, dict) or 'student_id' not in data:
+        return jsonify({'error': 'Missing student_id or student_answers in request'}), 400
+    results = save_student_results(quiz_id, data['student_id'], quiz['quiz_questions'], student_answers)
+    return jsonify({
+        'quiz_id': quiz_id,
+        'student_id': data['student_id'],
+        'correct': sum(1 for r in results if r['is_correct']),
+        'total': len(results),
+        'results': results
+    })
+
+@app.route('/pools', methods=['POST'])
+def create_pool():
+    """Create (or resize) the question pool for a lecture topic and start filling it."""
+    data = request.get_json(silent=True) or request.form
+    topic = (data.get('topic') or '').strip()
+    if not topic:
+        return jsonify({'error': 'Missing topic in request'}), 400
+    try:
+        target_size = int(data.get('target_size', quiz_pool.POOL_TARGET_SIZE))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if target_size < 1:
+        return jsonify({'error': 'target_size must be at least 1'}), 400
+    pool = quiz_pools.create(topic, target_size, data.get('class_id'))
+    return jsonify(pool), 202
+
+@app.route('/pools', methods=['GET'])
+def list_pools():
+    return jsonify(quiz_pools.stats())
+
+@app.route('/pools/<pool_id>', methods=['DELETE'])
+def delete_pool(pool_id):
+    if not quiz_store.delete_pool(pool_id):
+        return jsonify({'error': 'Pool not found'}), 404
+    return jsonify({'pool_id': pool_id, 'deleted': True})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_response(job))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = report_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_response(job))
+
 @app.route('/download/report', methods=['GET', 'HEAD'])
 def download_report():
-    report_path = os.path.abspath('comprehensive_class_report.pdf')
+    job_id = request.args.get('job_id')
+    if job_id:
+        job = report_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job['status'] != report_jobs.SUCCEEDED:
+            return jsonify({'error': f"Report is not ready (status: {job['status']})"}), 409
+    else:
+        # No job given: serve the most recent successful report
+        job = report_jobs.latest_succeeded()
+    report_path = os.path.abspath(job['output_path'] if job else 'comprehensive_class_report.pdf')
     if not os.path.exists(report_path):
         return jsonify({'error': 'Report not found'}), 404
     return send_file(report_path, as_attachment=True, mimetype='application/pdf')
 
 if __name__ == '__main__':
+    # Development server; use serve.py in production
     app.run(port=5011)
\ No newline at end of file
@@ -0,0 +1,216 @@
+import csv
+import importlib.util
+import json
+import math
+import os
+import re
+import threading
+import zipfile
+from collections import Counter
+from xml.etree import ElementTree
+import term_stats
+
+# pypdf is optional (without it PDFs are sent to the model as files) and is
+# imported only when a PDF is extracted
+HAVE_PYPDF = importlib.util.find_spec('pypdf') is not None
+
+# --- SETTINGS ---
+CACHE_DIR = os.path.join('cache', 'extracted')
+CHUNK_CHARS = 2000
+# Rough budget for lecture material in the prompt (~4 characters per token)
+TOKEN_BUDGET = 12000
+CHARS_PER_TOKEN = 4
+# Bump when extractors or chunking change, so cached text is re-extracted
+EXTRACTION_VERSION = 1
+
+_word_re = re.compile(r"[a-z0-9]{3,}")
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+A_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+S_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+# --- Extractors: path -> list of text sections (pages, slides, sheets, ...) ---
+
+def _extract_text(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return [f.read()]
+
+
+def _extract_csv(path):
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        return ['\n'.join(', '.join(row) for row in csv.reader(f))]
+
+
+def _extract_pdf(path):
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [page.extract_text() or '' for page in reader.pages]
+
+
+def _extract_docx(path):
+    with zipfile.ZipFile(path) as z:
+        root = ElementTree.fromstring(z.read('word/document.xml'))
+    paragraphs = [''.join(t.text or '' for t in p.iter(f'{W_NS}t')) for p in root.iter(f'{W_NS}p')]
+    return ['\n'.join(p for p in paragraphs if p.strip())]
+
+
+def _slide_number(name):
+    return int(re.search(r'(\d+)\.xml$', name).group(1))
+
+
+def _extract_pptx(path):
+    sections = []
+    with zipfile.ZipFile(path) as z:
+        slides = sorted((n for n in z.namelist() if re.match(r'ppt/slides/slide\d+\.xml$', n)), key=_slide_number)
+        for name in slides:
+            root = ElementTree.fromstring(z.read(name))
+            lines = [''.join(t.text or '' for t in p.iter(f'{A_NS}t')) for p in root.iter(f'{A_NS}p')]
+            sections.append(f"Slide {_slide_number(name)}:\n" + '\n'.join(l for l in lines if l.strip()))
+    return sections
+
+
+def _extract_xlsx(path):
+    sections = []
+    with zipfile.ZipFile(path) as z:
+        shared = []
+        if 'xl/sharedStrings.xml' in z.namelist():
+            root = ElementTree.fromstring(z.read('xl/sharedStrings.xml'))
+            shared = [''.join(t.text or '' for t in si.iter(f'{S_NS}t')) for si in root.iter(f'{S_NS}si')]
+        sheets = sorted((n for n in z.namelist() if re.match(r'xl/worksheets/sheet\d+\.xml$', n)), key=_slide_number)
+        for name in sheets:
+            root = ElementTree.fromstring(z.read(name))
+            rows = []
+            for row in root.iter(f'{S_NS}row'):
+                cells = []
+                for c in row.iter(f'{S_NS}c'):
+                    value = c.find(f'{S_NS}v')
+                    if c.get('t') == 's' and value is not None:
+                        cells.append(shared[int(value.text)])
+                    elif c.get('t') == 'inlineStr':
+                        cells.append(''.join(t.text or '' for t in c.iter(f'{S_NS}t')))
+                    elif value is not None:
+                        cells.append(value.text or '')
+                rows.append('\t'.join(cells))
+            sections.append('\n'.join(r for r in rows if r.strip()))
+    return sections
+
+
+EXTRACTORS = {
+    '.txt': _extract_text,
+    '.csv': _extract_csv,
+    '.docx': _extract_docx,
+    '.pptx': _extract_pptx,
+    '.xlsx': _extract_xlsx,
+}
+if HAVE_PYPDF:
+    EXTRACTORS['.pdf'] = _extract_pdf
+
+
+def register_extractor(extension, func):
+    """Add or replace the extractor for a file extension (e.g. '.md')."""
+    EXTRACTORS[extension.lower()] = func
+
+
+# --- Chunking and selection ---
+
+def chunk_sections(sections, max_chars=CHUNK_CHARS):
+    """Split sections into chunks of at most max_chars, breaking on paragraph then line boundaries."""
+    chunks = []
+    for section in sections:
+        section = section.strip()
+        if not section:
+            continue
+        current = ''
+        for piece in re.split(r'(\n\s*\n|\n)', section):
+            if len(current) + len(piece) > max_chars and current.strip():
+                chunks.append(current.strip())
+                current = ''
+            while len(piece) > max_chars:
+                chunks.append(piece[:max_chars])
+                piece = piece[max_chars:]
+            current += piece
+        if current.strip():
+            chunks.append(current.strip())
+    return chunks
+
+
+def terms(text):
+    return [w for w in _word_re.findall(text.lower()) if w not in term_stats.STOP_WORDS]
+
+
+def select_chunks(chunks, query, token_budget=TOKEN_BUDGET):
+    """Pick the chunks most relevant to query that fit in token_budget, in document order.
+
+    Chunks are ranked by TF-IDF overlap with the query terms; if the whole document
+    fits the budget it is returned unchanged.
+    """
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    if sum(len(c) for c in chunks) <= budget_chars:
+        return list(chunks)
+
+    chunk_terms = [Counter(terms(c)) for c in chunks]
+    doc_freq = Counter(t for counts in chunk_terms for t in counts)
+    query_terms = set(terms(query))
+    n = len(chunks)
+
+    def score(i):
+        counts = chunk_terms[i]
+        length = sum(counts.values()) or 1
+        return sum(counts[t] / length * math.log(1 + n / doc_freq[t]) for t in query_terms if t in counts)
+
+    # Ties (e.g. no query terms anywhere) keep document order, so the opening material wins
+    ranked = sorted(range(n), key=lambda i: (-score(i), i))
+    chosen = []
+    used = 0
+    for i in ranked:
+        if used + len(chunks[i]) > budget_chars:
+            continue
+        chosen.append(i)
+        used += len(chunks[i])
+    return [chunks[i] for i in sorted(chosen)]
+
+
+# --- Cached extraction ---
+
+def _cache_path(sha256):
+    return os.path.join(CACHE_DIR, f"{sha256}.v{EXTRACTION_VERSION}.json")
+
+
+def extract_chunks(upload):
+    """Text chunks for an uploads.SpooledUpload, or None if its type can't be extracted locally.
+
+    Results are cached on disk by the file's SHA-256.
+    """
+    extension = os.path.splitext(upload.filename)[1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        return None
+    cache_path = _cache_path(upload.sha256)
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    try:
+        chunks = chunk_sections(extractor(upload.path))
+    except Exception as e:
+        print(f"WARNING: Could not extract text from {upload.filename}: {e}")
+        return None
+    if not chunks:
+        # Nothing textual (e.g. a scanned PDF); let the model read the file itself
+        return None
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+    return chunks
+
+
+def relevant_text(upload, query, token_budget=TOKEN_BUDGET):
+    """Relevant excerpts of an upload for query, or None to fall back to sending the file."""
+    chunks = extract_chunks(upload)
+    if chunks is None:
+        return None
+    selected = select_chunks(chunks, query, token_budget)
+    print(f"Using {len(selected)} of {len(chunks)} extracted chunks from {upload.filename}")
+    return '\n\n---\n\n'.join(selected)
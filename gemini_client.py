@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import threading
+import time
+import model_registry
+
+# --- SETTINGS ---
+# Calls in flight at once across the whole process
+MAX_IN_FLIGHT = 32
+# Default per-API-key quota; override with "requests_per_minute" / "tokens_per_minute" in classroom-ai.json
+REQUESTS_PER_MINUTE = 60
+TOKENS_PER_MINUTE = 1_000_000
+CHARS_PER_TOKEN = 4
+# Output tokens assumed for a call whose generation config doesn't set max_output_tokens
+DEFAULT_OUTPUT_TOKENS = 2048
+# Retried status codes: rate limited, server error, unavailable, deadline exceeded
+RETRY_STATUS_CODES = {429, 500, 503, 504}
+MAX_ATTEMPTS = 5
+RETRY_INITIAL_SECONDS = 2
+RETRY_MAX_SECONDS = 60
+
+
+class TokenBucket:
+    """Asyncio token bucket: capacity tokens, refilled continuously over 60 seconds."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until amount tokens are available and take them; returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= amount
+        return waited
+
+    def adjust(self, amount):
+        """Return (positive) or charge (negative) tokens once the real cost is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def estimate_tokens(contents, generation_config=None):
+    """Rough token cost of a call: prompt text plus the output budget."""
+    if isinstance(contents, str):
+        text_chars = len(contents)
+    else:
+        text_chars = sum(len(part) for part in contents if isinstance(part, str))
+    config = generation_config or {}
+    max_output = config.get('max_output_tokens') if isinstance(config, dict) else getattr(config, 'max_output_tokens', None)
+    return text_chars // CHARS_PER_TOKEN + (max_output or DEFAULT_OUTPUT_TOKENS)
+
+
+def is_retryable(exc):
+    """True for quota (429) and transient server errors from the Gemini API."""
+    return getattr(exc, 'code', None) in RETRY_STATUS_CODES
+
+
+# State below lives on (and is only touched from) the client's event loop thread
+_loop = None
+_loop_lock = threading.Lock()
+_semaphore = None
+_limiters = {}
+_metrics = {'queued': 0, 'in_flight': 0, 'completed': 0, 'failed': 0, 'retries': 0, 'throttled_seconds': 0.0}
+
+
+def _get_loop():
+    """Start the client's event loop on a daemon thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='gemini-client', daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def _limiter_for_key():
+    """(requests bucket, tokens bucket) for the configured API key."""
+    config = model_registry.get_config()
+    key_id = hashlib.sha256(config['gemini_api_key'].encode('utf-8')).hexdigest()[:16]
+    if key_id not in _limiters:
+        _limiters[key_id] = (
+            TokenBucket(config.get('requests_per_minute', REQUESTS_PER_MINUTE)),
+            TokenBucket(config.get('tokens_per_minute', TOKENS_PER_MINUTE)),
+        )
+    return _limiters[key_id]
+
+
+async def _acquire(requests_bucket, tokens_bucket, estimate):
+    """Wait for the key's quota and an in-flight slot (release with _release)."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    _metrics['queued'] += 1
+    try:
+        throttled = await requests_bucket.acquire(1)
+        throttled += await tokens_bucket.acquire(estimate)
+        await _semaphore.acquire()
+    finally:
+        _metrics['queued'] -= 1
+    _metrics['throttled_seconds'] += throttled
+    _metrics['in_flight'] += 1
+
+
+def _release(tokens_bucket, estimate, response=None):
+    """Free the in-flight slot and settle the token estimate against the real usage."""
+    _metrics['in_flight'] -= 1
+    _semaphore.release()
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None and getattr(usage, 'total_token_count', None):
+        tokens_bucket.adjust(estimate - usage.total_token_count)
+
+
+async def _with_retries(attempt):
+    """Await attempt(), retrying quota and transient errors with jittered backoff."""
+    import tenacity
+
+    def before_sleep(retry_state):
+        _metrics['retries'] += 1
+        print(f"WARNING: Gemini call failed ({retry_state.outcome.exception()}), "
+              f"retrying in {retry_state.next_action.sleep:.1f}s")
+
+    try:
+        async for retry in tenacity.AsyncRetrying(
+            retry=tenacity.retry_if_exception(is_retryable),
+            wait=tenacity.wait_exponential_jitter(initial=RETRY_INITIAL_SECONDS, max=RETRY_MAX_SECONDS),
+            stop=tenacity.stop_after_attempt(MAX_ATTEMPTS),
+            before_sleep=before_sleep,
+            reraise=True,
+        ):
+            with retry:
+                result = await attempt()
+    except Exception:
+        _metrics['failed'] += 1
+        raise
+    return result
+
+
+async def generate_content_async(model_name, contents, generation_config=None):
+    """Rate-limited, retried generate_content_async call; returns the SDK response."""
+    requests_bucket, tokens_bucket = _limiter_for_key()
+    estimate = estimate_tokens(contents, generation_config)
+    model = model_registry.get_model(model_name, generation_config)
+
+    async def attempt():
+        await _acquire(requests_bucket, tokens_bucket, estimate)
+        response = None
+        try:
+            response = await model.generate_content_async(contents)
+        finally:
+            _release(tokens_bucket, estimate, response)
+        return response
+
+    response = await _with_retries(attempt)
+    _metrics['completed'] += 1
+    return response
+
+
+def generate_content(model_name, contents, generation_config=None):
+    """Blocking wrapper: run the call on the shared event loop and wait for its response.
+
+    Many threads can wait here while the loop keeps up to MAX_IN_FLIGHT calls going.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        generate_content_async(model_name, contents, generation_config), _get_loop()
+    )
+    return future.result()
+
+
+async def _open_stream(model_name, contents, generation_config):
+    """Start a streaming call under the same quota and retries; the slot stays held."""
+    requests_bucket, tokens_bucket = _limiter_for_key()
+    estimate = estimate_tokens(contents, generation_config)
+    model = model_registry.get_model(model_name, generation_config)
+
+    async def attempt():
+        await _acquire(requests_bucket, tokens_bucket, estimate)
+        try:
+            return await model.generate_content_async(contents, stream=True)
+        except BaseException:
+            _release(tokens_bucket, estimate)
+            raise
+
+    response = await _with_retries(attempt)
+    return response, response.__aiter__(), tokens_bucket, estimate
+
+
+async def _next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+def _close_stream(tokens_bucket, estimate, response, failed):
+    _release(tokens_bucket, estimate, None if failed else response)
+    _metrics['failed' if failed else 'completed'] += 1
+
+
+def generate_content_stream(model_name, contents, generation_config=None):
+    """Blocking streaming call: yields the response chunks as they arrive.
+
+    Quota, the in-flight limit and retries apply as for generate_content. Only
+    opening the stream is retried; the in-flight slot is held until the stream
+    is exhausted or closed.
+    """
+    loop = _get_loop()
+    response, chunks, tokens_bucket, estimate = asyncio.run_coroutine_threadsafe(
+        _open_stream(model_name, contents, generation_config), loop
+    ).result()
+    failed = False
+    try:
+        while True:
+            chunk = asyncio.run_coroutine_threadsafe(_next_chunk(chunks), loop).result()
+            if chunk is None:
+                break
+            yield chunk
+    except Exception:
+        failed = True
+        raise
+    finally:
+        loop.call_soon_threadsafe(_close_stream, tokens_bucket, estimate, response, failed)
+
+
+def stats():
+    """Queue depth, in-flight calls and counters for this process."""
+    metrics = dict(_metrics)
+    metrics['throttled_seconds'] = round(metrics['throttled_seconds'], 2)
+    metrics['max_in_flight'] = MAX_IN_FLIGHT
+    return metrics
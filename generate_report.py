@@ -1,72 +1,40 @@
 import json
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from wordcloud import WordCloud
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak, KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak, KeepTogether
 from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-import string
 import os
-import re
+import time
 from datetime import datetime
-from collections import Counter, defaultdict
-import google.generativeai as genai
-import matplotlib.pyplot as plt
-import seaborn as sns
-from io import BytesIO
-import base64
+from collections import defaultdict
+import analysis_cache
+import item_analysis
+import quiz_store
+import report_cache
+import report_charts
+import report_pipeline
+import report_stream
+import report_styles
+import response_cache
+import term_stats
+import wordcloud_service
 
 # --- SETTINGS ---
 quiz_file_path = "quiz_response.json"
 feedback_file_path = "dbtt_class_feedback.csv"
 output_filename = "comprehensive_class_report.pdf"
+# Chart rendering profile: 'draft', 'print' or 'vector' (see report_charts)
+CHART_QUALITY = 'print'
 
-# Configure Gemini API (you'll need to set your API key)
-
-# --- Configure Gemini API globally ---
-try:
-    with open('classroom-ai.json', 'r') as f:
-        config = json.load(f)
-    genai.configure(api_key=config['gemini_api_key'])
-except Exception as e:
-    print(f"ERROR: Failed to configure Gemini API – {e}")
-    # Optionally: exit early or raise
-
-
-stop_words = set("""
-a about above after again against all am an and any are aren't as at be because been before being below between
-both but by can't cannot could couldn't did didn't do does doesn't doing don't down during each few for from
-further had hadn't has hasn't have haven't having he he'd he'll he's her here here's hers herself him himself his
-how how's i i'd i'll i'm i've if in into is isn't it it's its itself let's me more most mustn't my myself no nor
-not of off on once only or other ought our ours ourselves out over own same shan't she she'd she'll she's should
-shouldn't so some such than that that's the their theirs them themselves then there there's these they they'd
-they'll they're they've this those through to too under until up very was wasn't we we'd we'll we're we've were
-weren't what what's when when's where where's which while who who's whom why why's with won't would wouldn't you
-you'd you'll you're you've your yours yourself yourselves
-""".split())
-
-def sanitize_filename(filename):
-    """Convert a string into a safe filename by removing special characters."""
-    safe_name = re.sub(r'[^a-zA-Z0-9]', '_', filename)
-    safe_name = re.sub(r'_+', '_', safe_name)
-    safe_name = safe_name.strip('_')
-    return safe_name
-
-def preprocess_text(text):
-    """Preprocess text for word frequency analysis."""
-    if pd.isna(text) or not text:
-        return ""
-    text = str(text).lower()
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    return ' '.join([word for word in text.split() if word not in stop_words and len(word) > 2])
+# Gemini is configured lazily by model_registry (reads classroom-ai.json on first use)
 
 def analyze_quiz_with_ai(quiz_data):
-    """Use Gemini to analyze quiz content and provide educational insights."""
+    """Use Gemini to analyze quiz content and provide educational insights.
+
+    Responses are memoized by prompt (see analysis_cache), tagged with the quiz id.
+    """
     try:
-        model = genai.GenerativeModel('gemini-2.5-pro')
         # Prepare student responses and questions for analysis
         questions = []
         responses = []
@@ -105,9 +73,8 @@ def analyze_quiz_with_ai(quiz_data):
         4. Recommendations for Educators
         Format your response for direct inclusion in a report (no asterisks or markdown, use clear paragraphs and bullet points if needed).
         """
-        response = model.generate_content(analysis_prompt)
+        text = analysis_cache.generate_text(analysis_prompt, 'gemini-2.5-pro', tag=quiz_data.get('id'))
         # Clean up asterisks and markdown from the AI output
-        text = response.text
         # Remove leading asterisks and extra whitespace from lines
         lines = [line.lstrip('*').strip() for line in text.splitlines()]
         # Remove empty lines and join with double newlines for paragraph breaks
@@ -115,15 +82,13 @@ def analyze_quiz_with_ai(quiz_data):
         return cleaned
     except Exception as e:
         print(f"WARNING: Could not generate AI analysis: {e}")
-        return "AI analysis unavailable. Please check your Gemini API configuration."
+        # The report pipeline substitutes a placeholder (and doesn't cache it)
+        raise
 
-def analyze_feedback_with_ai(feedback_data, numeric_stats):
-    """Use Gemini to analyze student feedback."""
+def analyze_feedback_with_ai(feedback_data, numeric_stats, quiz_id=None):
+    """Use Gemini to analyze student feedback (memoized by prompt, tagged with quiz_id)."""
     try:
-        model = genai.GenerativeModel('gemini-2.5-pro')
-        
         # Prepare feedback summary
-        import numpy as np
         def make_json_serializable(obj):
             if isinstance(obj, dict):
                 return {k: make_json_serializable(v) for k, v in obj.items()}
@@ -189,104 +154,46 @@ def analyze_feedback_with_ai(feedback_data, numeric_stats):
 
         Provide specific, actionable insights that an educator can implement.
         """
-        response = model.generate_content(analysis_prompt)
-        return response.text
+        return analysis_cache.generate_text(analysis_prompt, 'gemini-2.5-pro', tag=quiz_id)
         
     except Exception as e:
         print(f"WARNING: Could not generate feedback AI analysis: {e}")
-        return "Feedback AI analysis unavailable. Please check your Gemini API configuration."
+        # The report pipeline substitutes a placeholder (and doesn't cache it)
+        raise
 
-def create_visualization_charts(quiz_data, feedback_data=None):
-    """Create educational visualization charts."""
-    chart_paths = []
-    
+def create_visualization_charts(quiz_data, feedback_data=None, quality=None):
+    """Render the educational charts in memory; returns report_charts chart dicts.
+
+    quality is a report_charts.QUALITY_PROFILES name (default CHART_QUALITY).
+    """
+    charts = []
     try:
-        # Set style for better-looking charts
-        plt.style.use('seaborn-v0_8')
-        
-        # 1. Question Type Distribution
-        question_types = defaultdict(int)
-        for quiz in quiz_data['quiz_questions']:
-            question_text = quiz['question'].lower()
-            if 'what' in question_text:
-                question_types['What'] += 1
-            elif 'how' in question_text:
-                question_types['How'] += 1
-            elif 'why' in question_text:
-                question_types['Why'] += 1
-            elif 'which' in question_text:
-                question_types['Which'] += 1
-            elif 'when' in question_text:
-                question_types['When'] += 1
-            else:
-                question_types['Other'] += 1
-        
-        if question_types:
-            fig, ax = plt.subplots(figsize=(8, 6))
-            types = list(question_types.keys())
-            counts = list(question_types.values())
-            colors_palette = plt.cm.Set3(range(len(types)))
-            
-            bars = ax.bar(types, counts, color=colors_palette)
-            ax.set_title('Distribution of Question Types', fontsize=14, fontweight='bold')
-            ax.set_ylabel('Number of Questions')
-            ax.set_xlabel('Question Type')
-            
-            # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}', ha='center', va='bottom')
-            
-            plt.tight_layout()
-            chart_path = 'question_types_chart.png'
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-            chart_paths.append(chart_path)
-            plt.close()
-        
-        # 2. Question Complexity Analysis (based on explanation length and option complexity)
-        if len(quiz_data['quiz_questions']) > 1:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            question_nums = []
-            complexity_scores = []
-            
-            for i, quiz in enumerate(quiz_data['quiz_questions'], 1):
-                # Simple complexity metric based on explanation length and number of concepts
-                explanation_words = len(quiz['explanation'].split())
-                option_complexity = sum(len(opt.split()) for opt in quiz.get('options', {}).values())
-                complexity = (explanation_words + option_complexity) / 10  # Normalize
-                
-                question_nums.append(f'Q{i}')
-                complexity_scores.append(complexity)
-            
-            bars = ax.bar(question_nums, complexity_scores, color='lightblue', edgecolor='navy', alpha=0.7)
-            ax.set_title('Question Complexity Analysis', fontsize=14, fontweight='bold')
-            ax.set_ylabel('Complexity Score')
-            ax.set_xlabel('Questions')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{height:.1f}', ha='center', va='bottom')
-            
-            plt.tight_layout()
-            chart_path = 'question_complexity_chart.png'
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-            chart_paths.append(chart_path)
-            plt.close()
-    
+        for spec in report_charts.chart_specs(quiz_data):
+            charts.append(report_charts.render(spec, quality or CHART_QUALITY))
     except Exception as e:
         print(f"WARNING: Could not generate charts: {e}")
-    
-    return chart_paths
+    return charts
 
-def analyze_quiz_content(quiz_data):
-    """Enhanced quiz content analysis."""
-    analysis = {
-        'total_questions': len(quiz_data['quiz_questions']),
+def analyze_feedback_stage(quiz_id, feedback):
+    """Run the feedback AI analysis when load_feedback_data found something to analyze."""
+    feedback_analysis, numeric_summary, _, _ = feedback
+    if feedback_analysis and numeric_summary is not None:
+        print("Analyzing student feedback with AI...")
+        return analyze_feedback_with_ai(feedback_analysis, numeric_summary, quiz_id)
+    return ""
+
+def render_wordclouds(quiz_analysis):
+    """One word cloud per text category as PNG bytes; returns [(category, png)].
+
+    Rendered clouds are cached by their terms and settings (see wordcloud_service).
+    """
+    images = wordcloud_service.render_many(quiz_analysis['word_frequencies'])
+    return list(images.items())
+
+def empty_quiz_analysis(total_questions=0):
+    """Quiz analysis structure with no findings (also used when analysis fails)."""
+    return {
+        'total_questions': total_questions,
         'question_types': defaultdict(int),
         'difficulty_indicators': [],
         'topic_coverage': [],
@@ -294,6 +201,10 @@ def analyze_quiz_content(quiz_data):
         'option_analysis': defaultdict(int),
         'cognitive_levels': defaultdict(int)
     }
+
+def analyze_quiz_content(quiz_data):
+    """Enhanced quiz content analysis."""
+    analysis = empty_quiz_analysis(len(quiz_data['quiz_questions']))
     
     # Combine all text for word frequency analysis
     all_questions = []
@@ -313,18 +224,7 @@ def analyze_quiz_content(quiz_data):
         
         # Question type analysis
         question_text = quiz['question'].lower()
-        if 'what' in question_text:
-            analysis['question_types']['What'] += 1
-        elif 'how' in question_text:
-            analysis['question_types']['How'] += 1
-        elif 'why' in question_text:
-            analysis['question_types']['Why'] += 1
-        elif 'which' in question_text:
-            analysis['question_types']['Which'] += 1
-        elif 'when' in question_text:
-            analysis['question_types']['When'] += 1
-        else:
-            analysis['question_types']['Other'] += 1
+        analysis['question_types'][report_charts.question_type(question_text)] += 1
         
         # Simple cognitive level analysis based on question stems
         if any(word in question_text for word in ['analyze', 'compare', 'evaluate', 'assess']):
@@ -338,30 +238,20 @@ def analyze_quiz_content(quiz_data):
     
     # Generate word frequencies for different text types
     text_categories = {
-        'Questions': ' '.join(all_questions),
-        'Explanations': ' '.join(all_explanations),
-        'Answer Options': ' '.join(all_options)
+        'Questions': all_questions,
+        'Explanations': all_explanations,
+        'Answer Options': all_options
     }
     
-    for category, text in text_categories.items():
-        if text.strip():
-            processed_text = preprocess_text(text)
-            if processed_text:
-                vectorizer = CountVectorizer()
-                try:
-                    matrix = vectorizer.fit_transform([processed_text])
-                    word_freq = dict(zip(vectorizer.get_feature_names_out(), matrix.toarray()[0]))
-                    analysis['word_frequencies'][category] = dict(
-                        sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:30]
-                    )
-                except:
-                    analysis['word_frequencies'][category] = {}
+    for category, texts in text_categories.items():
+        word_freq = term_stats.top_terms(texts, 30)
+        if word_freq:
+            analysis['word_frequencies'][category] = word_freq
     
     return analysis
 
-def load_feedback_data():
-    """Load and analyze feedback CSV if available, and student JSON files if provided."""
-    import glob
+def load_feedback_data(feedback_path=None, quiz_id=None, submitted_before=None):
+    """Load and analyze feedback CSV if available, and stored student results for quiz_id."""
     import pandas as pd  # Ensure pandas is available for all uses in this function
     feedback_analysis = {}
     numeric_summary = None
@@ -369,67 +259,39 @@ def load_feedback_data():
     numeric_cols = []
     # Load CSV feedback as before
     try:
-        df = pd.read_csv(feedback_file_path, encoding="ISO-8859-1")
+        df = pd.read_csv(feedback_path or feedback_file_path, encoding="ISO-8859-1")
         if len(df.columns) >= 5:
             open_ended_cols = df.columns[:5]
             numeric_cols = df.columns[5:]
-            df_cleaned = df.copy()
             for col in open_ended_cols:
-                df_cleaned[col] = df_cleaned[col].apply(preprocess_text)
-            for col in open_ended_cols:
-                text = ' '.join(df_cleaned[col].dropna())
-                if text.strip():
-                    vectorizer = CountVectorizer()
-                    try:
-                        matrix = vectorizer.fit_transform([text])
-                        word_freq = dict(zip(vectorizer.get_feature_names_out(), matrix.toarray()[0]))
-                        feedback_analysis[col] = dict(
-                            sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]
-                        )
-                    except:
-                        feedback_analysis[col] = {}
+                word_freq = term_stats.top_terms(df[col], 20)
+                if word_freq:
+                    feedback_analysis[col] = word_freq
             numeric_summary = df[numeric_cols].describe().round(2) if len(numeric_cols) > 0 else None
     except FileNotFoundError:
         print("INFO: No feedback CSV found. Generating quiz-only report.")
     except Exception as e:
         print(f"WARNING: Error loading feedback data: {e}")
 
-    # --- NEW: Load student JSON files ---
-    student_files = glob.glob("student_response_*.json")
-    print(f"DEBUG: Found student response files: {student_files}")
-    student_results = []
-    for sf in student_files:
-        try:
-            with open(sf, "r", encoding="utf-8") as f:
-                student_data = json.load(f)
-                print(f"DEBUG: Loaded student data from {sf}: {student_data}")
-                student_results.append(student_data)
-        except Exception as e:
-            print(f"WARNING: Could not load {sf}: {e}")
-
-    # Aggregate student results for analysis
-    if student_results:
-        print(f"DEBUG: Aggregating {len(student_results)} student results...")
-        # For each question, count correct/wrong
-        question_stats = {}
-        for student in student_results:
-            for idx, res in enumerate(student.get('results', [])):
-                qtext = res.get('question', f"Q{idx+1}")
-                if qtext not in question_stats:
-                    question_stats[qtext] = {'correct': 0, 'wrong': 0}
-                if res.get('is_correct'):
-                    question_stats[qtext]['correct'] += 1
-                else:
-                    question_stats[qtext]['wrong'] += 1
-        print(f"DEBUG: Aggregated question stats: {question_stats}")
+    # Student results for this quiz from the quiz store, aggregated per question
+    results = quiz_store.results_frame(quiz_id, submitted_before)
+    if not results.empty:
+        print(f"DEBUG: Aggregating {results['student_id'].nunique()} student results...")
+        results['question'] = results['question'].fillna('Q' + (results['question_index'] + 1).astype(str))
+        per_question = (results.groupby(['question_index', 'question'], sort=True)['is_correct']
+                        .agg(['sum', 'count']))
+        perf_df = pd.DataFrame({
+            'correct': per_question['sum'].to_numpy(),
+            'wrong': (per_question['count'] - per_question['sum']).to_numpy()
+        }, index=per_question.index.get_level_values('question'))
         # Add to feedback_analysis for reporting
-        feedback_analysis['Student Quiz Performance'] = question_stats
+        feedback_analysis['Student Quiz Performance'] = {
+            question: {'correct': int(row.correct), 'wrong': int(row.wrong)}
+            for question, row in zip(perf_df.index, perf_df.itertuples())
+        }
         # Also create a numeric summary (as DataFrame)
-        perf_df = pd.DataFrame.from_dict(question_stats, orient='index')
-        print(f"DEBUG: Student performance DataFrame:\n{perf_df}")
-        if not perf_df.empty:
-            numeric_summary = perf_df.describe().round(2)
-            print(f"DEBUG: Student performance summary:\n{numeric_summary}")
+        numeric_summary = perf_df.describe().round(2)
+        print(f"DEBUG: Student performance summary:\n{numeric_summary}")
 
     return feedback_analysis, numeric_summary, open_ended_cols, numeric_cols
 
@@ -461,115 +323,113 @@ def create_enhanced_quiz_table(analysis):
     
     return table_data
 
-def generate_report():
-    """Generate the comprehensive educational PDF report."""
-    
-    # Load quiz data
+def item_analysis_stage(quiz_data, results_before=None):
+    """Item analysis of the stored student results for this quiz, or None."""
+    if not quiz_data.get('id'):
+        return None
+    results = quiz_store.results_frame(quiz_data['id'], results_before)
+    return item_analysis.analyze_results(results, quiz_data['quiz_questions'])
+
+def create_item_analysis_table(stats):
+    """Rows for the per-question item analysis table."""
+    table_data = [['Question', 'Correct', 'Difficulty (p)', 'Discrimination', 'Top Distractor', 'Review']]
+    for i in range(stats['questions']):
+        p_value = stats['p_values'][i]
+        discrimination = stats['point_biserial'][i]
+        distractors = [(rates[i], option) for option, rates in stats['option_rates'].items()
+                       if option != stats['key'][i] and rates[i] > 0]
+        top = max(distractors) if distractors else None
+        table_data.append([
+            f"Q{i + 1}",
+            (stats['key'][i] or '-').upper(),
+            f"{p_value:.2f}",
+            '-' if np.isnan(discrimination) else f"{discrimination:.2f}",
+            f"{top[1].upper()} ({top[0]:.0%})" if top else '-',
+            item_analysis.item_flags(p_value, discrimination) or 'OK'
+        ])
+    return table_data
+
+def warm_up():
+    """Do the one-off per-process setup of a report (matplotlib fonts, a pooled figure, styles) ahead of time."""
+    spec = report_charts.chart_specs({'quiz_questions': [
+        {'question': 'What?', 'options': {}, 'explanation': ''},
+        {'question': 'Why?', 'options': {}, 'explanation': ''},
+    ]})[1]
+    report_charts.render_png(spec, dpi=10)
+    report_styles.static_section('title')
+
+class ReportError(Exception):
+    """Raised when the report cannot be produced; the message says why."""
+
+class ReportCancelled(ReportError):
+    """Raised when cancel_check() asks for the build to stop."""
+
+def load_quiz_data(quiz_path=None, quiz_id=None):
+    """Quiz data by id from the quiz store, or from a JSON file.
+
+    With neither given, the latest stored quiz is used, falling back to quiz_file_path.
+    """
+    if quiz_id:
+        quiz_data = quiz_store.get_quiz(quiz_id)
+        if quiz_data is None:
+            print(f"ERROR: Quiz not found: {quiz_id}")
+            raise ReportError(f"Quiz not found: {quiz_id}")
+        return quiz_data
+    if not quiz_path:
+        quiz_data = quiz_store.latest_quiz()
+        if quiz_data is not None:
+            return quiz_data
+        quiz_path = quiz_file_path
     try:
-        with open(quiz_file_path, 'r', encoding='utf-8') as f:
-            quiz_data = json.load(f)
+        with open(quiz_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     except FileNotFoundError:
-        print(f"ERROR: Quiz response file not found: {quiz_file_path}")
-        return
+        print(f"ERROR: Quiz response file not found: {quiz_path}")
+        raise ReportError(f"Quiz response file not found: {quiz_path}")
     except json.JSONDecodeError as e:
         print(f"ERROR: Error parsing quiz JSON: {e}")
-        return
-    
-    # Analyze quiz content
-    quiz_analysis = analyze_quiz_content(quiz_data)
-    
-    # Generate AI analysis
-    print("Generating AI-powered educational insights...")
-    ai_quiz_analysis = analyze_quiz_with_ai(quiz_data)
-    
-    # Load feedback data (optional)
-    feedback_analysis, numeric_summary, open_ended_cols, numeric_cols = load_feedback_data()
-    
-    # Generate AI feedback analysis if feedback exists
-    ai_feedback_analysis = ""
-    if feedback_analysis and numeric_summary is not None:
-        print("Analyzing student feedback with AI...")
-        ai_feedback_analysis = analyze_feedback_with_ai(feedback_analysis, numeric_summary)
-    
-    # Create visualization charts
-    print("Creating educational visualizations...")
-    chart_paths = create_visualization_charts(quiz_data, feedback_analysis)
-    
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        output_filename,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
-    
-    # Enhanced styles
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=22,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor=colors.darkblue
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=15,
-        spaceBefore=20,
-        keepWithNext=True,
-        textColor=colors.darkblue,
-        borderWidth=1,
-        borderColor=colors.lightgrey,
-        borderPadding=5
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=14,
-        spaceAfter=10,
-        spaceBefore=15,
-        keepWithNext=True,
-        textColor=colors.darkgreen
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        alignment=TA_JUSTIFY,
-        spaceBefore=6,
-        spaceAfter=6
-    )
-    
-    # Create story (content)
-    story = []
+        raise ReportError(f"Error parsing quiz JSON: {e}")
+
+def section_cache_keys(quiz_data, feedback_path, results_before, chart_quality=None):
+    """Content hash of each cached report section's inputs."""
+    feedback_path = feedback_path or feedback_file_path
+    feedback_hash = response_cache.file_sha256(feedback_path) if os.path.exists(feedback_path) else None
+    results = quiz_store.results_fingerprint(quiz_data.get('id'), results_before)
+    quiz = report_cache.section_key(quiz_data['quiz_questions'])
+    feedback = report_cache.section_key(feedback_hash, quiz_data.get('id'), results)
+    # The AI sections are not listed: analysis_cache memoizes them per prompt and
+    # can drop them per quiz, which a section entry would outlive
+    return {
+        'quiz_analysis': quiz,
+        'charts': report_cache.section_key(quiz, chart_quality or CHART_QUALITY),
+        'wordclouds': report_cache.section_key(quiz, wordcloud_service.WORDCLOUD_SETTINGS),
+        'feedback': feedback,
+        'item_analysis': report_cache.section_key(quiz, results),
+    }
+
+def report_story(quiz_data, results):
+    """Flowables of the report, section by section, from the pipeline results.
+
+    A generator: with report_stream.StreamingStory each section is built only when
+    layout reaches it, so large reports never hold every flowable at once.
+    """
+    quiz_analysis = results['quiz_analysis']
+    ai_quiz_analysis = results['ai_quiz_analysis']
+    feedback_analysis, numeric_summary, open_ended_cols, numeric_cols = results['feedback']
+    ai_feedback_analysis = results['ai_feedback_analysis']
+    item_stats = results['item_analysis']
+    charts = results['charts']
+    wordclouds = results['wordclouds']
+    
+    # Styles, table styles and the fixed sections are built once per process (see report_styles)
+    styles = report_styles.get_styles()
+    table_styles = report_styles.get_table_styles()
+    heading_style = styles['heading']
+    subheading_style = styles['subheading']
+    normal_style = styles['normal']
     
     # Enhanced Title Page
-    story.append(Paragraph("Educational Assessment Analysis Report", title_style))
-    story.append(Spacer(1, 20))
-    
-    # Executive Summary Box
-    summary_style = ParagraphStyle(
-        'Summary',
-        parent=styles['Normal'],
-        fontSize=10,
-        leading=12,
-        leftIndent=20,
-        rightIndent=20,
-        spaceBefore=10,
-        spaceAfter=10,
-        borderWidth=1,
-        borderColor=colors.grey,
-        borderPadding=10,
-        backColor=colors.lightblue
-    )
+    yield from report_styles.static_section('title')
     
     exec_summary = f"""
     <b>EXECUTIVE SUMMARY</b><br/>
@@ -582,51 +442,26 @@ def generate_report():
     and actionable recommendations for educators.
     """
     
-    story.append(Paragraph(exec_summary, summary_style))
-    story.append(PageBreak())
+    yield Paragraph(exec_summary, styles['summary'])
+    yield PageBreak()
     
     # Table of Contents
-    story.append(Paragraph("Table of Contents", heading_style))
-    toc_items = [
-        "1. Quiz Content Analysis",
-        "2. Educational Quality Assessment",
-        "3. AI-Powered Pedagogical Insights", 
-        "4. Visual Analytics",
-        "5. Individual Question Analysis",
-        "6. Student Feedback Analysis (if available)",
-        "7. Recommendations for Improvement"
-    ]
-    
-    for item in toc_items:
-        story.append(Paragraph(item, normal_style))
-    
-    story.append(PageBreak())
+    yield from report_styles.static_section('table_of_contents')
     
     # 1. Quiz Content Analysis
-    story.append(Paragraph("1. Quiz Content Analysis", heading_style))
+    yield Paragraph("1. Quiz Content Analysis", heading_style)
     
     # Enhanced analysis table
     enhanced_table_data = create_enhanced_quiz_table(quiz_analysis)
     enhanced_table = Table(enhanced_table_data, colWidths=[150, 80, 250])
-    enhanced_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
-    
-    story.append(enhanced_table)
-    story.append(Spacer(1, 20))
+    enhanced_table.setStyle(table_styles['quiz'])
+    
+    yield enhanced_table
+    yield Spacer(1, 20)
     
     # 2. Educational Quality Assessment
-    story.append(PageBreak())
-    story.append(Paragraph("2. Educational Quality Assessment", heading_style))
+    yield PageBreak()
+    yield Paragraph("2. Educational Quality Assessment", heading_style)
     
     # Key metrics summary
     quality_metrics = f"""
@@ -636,11 +471,11 @@ def generate_report():
     <b>Assessment Balance:</b> Questions distributed across {len(quiz_analysis['question_types'])} different question types
     """
     
-    story.append(Paragraph(quality_metrics, normal_style))
-    story.append(Spacer(1, 15))
+    yield Paragraph(quality_metrics, normal_style)
+    yield Spacer(1, 15)
     
     # 3. AI-Powered Insights
-    story.append(Paragraph("3. AI-Powered Pedagogical Insights", heading_style))
+    yield Paragraph("3. AI-Powered Pedagogical Insights", heading_style)
     # Improved formatting: split into paragraphs and bullet points
     ai_paragraphs = [p.strip() for p in ai_quiz_analysis.split('\n\n') if p.strip()]
     for paragraph in ai_paragraphs:
@@ -648,54 +483,33 @@ def generate_report():
         if paragraph.startswith('- '):
             bullets = [item.strip('- ').strip() for item in paragraph.split('\n') if item.strip()]
             for bullet in bullets:
-                story.append(Paragraph(f'• {bullet}', normal_style))
-                story.append(Spacer(1, 4))
+                yield Paragraph(f'• {bullet}', normal_style)
+                yield Spacer(1, 4)
         else:
-            story.append(Paragraph(paragraph, normal_style))
-            story.append(Spacer(1, 8))
+            yield Paragraph(paragraph, normal_style)
+            yield Spacer(1, 8)
     
     # 4. Visual Analytics
-    story.append(PageBreak())
-    story.append(Paragraph("4. Visual Analytics", heading_style))
+    yield PageBreak()
+    yield Paragraph("4. Visual Analytics", heading_style)
     
-    # Include charts
-    for chart_path in chart_paths:
-        if os.path.exists(chart_path):
-            try:
-                img = Image(chart_path, width=6*inch, height=4*inch)
-                story.append(img)
-                story.append(Spacer(1, 15))
-            except Exception as e:
-                print(f"WARNING: Could not include chart {chart_path}: {e}")
+    # Include charts (rendered in memory, or as vector drawings)
+    for chart in charts:
+        try:
+            yield report_charts.flowable(chart)
+            yield Spacer(1, 15)
+        except Exception as e:
+            print(f"WARNING: Could not include chart {chart['name']}: {e}")
     
     # Word clouds with better formatting
-    image_paths = []
-    for category, word_freq in quiz_analysis['word_frequencies'].items():
-        if word_freq:
-            try:
-                # Create more educational word cloud
-                wc = WordCloud(
-                    width=800, 
-                    height=400, 
-                    background_color='white',
-                    colormap='viridis',
-                    max_words=30
-                ).generate_from_frequencies(word_freq)
-                
-                image_path = f"{sanitize_filename(category)}_educational_wordcloud.png"
-                wc.to_file(image_path)
-                image_paths.append(image_path)
-                
-                story.append(Paragraph(f"{category} - Key Educational Terms", subheading_style))
-                img = Image(image_path, width=6*inch, height=3*inch)
-                story.append(img)
-                story.append(Spacer(1, 15))
-            except Exception as e:
-                print(f"WARNING: Could not generate word cloud for {category}: {e}")
+    for category, image in wordclouds:
+        yield Paragraph(f"{category} - Key Educational Terms", subheading_style)
+        yield report_stream.embedded_image(image, 6*inch, 3*inch)
+        yield Spacer(1, 15)
     
     # 5. Individual Question Analysis
-    story.append(PageBreak())
-    story.append(Paragraph("5. Individual Question Analysis", heading_style))
+    yield PageBreak()
+    yield Paragraph("5. Individual Question Analysis", heading_style)
     
     for i, quiz in enumerate(quiz_data['quiz_questions'], 1):
         question_elements = []
@@ -709,7 +523,7 @@ def generate_report():
         for key, option in options.items():
             if key == quiz.get('correct'):
                 question_elements.append(Paragraph(f"<b>{key.upper()}:</b> {option} ✓ <i>(Correct Answer)</i>", 
-                                                 ParagraphStyle('CorrectAnswer', parent=normal_style, textColor=colors.darkgreen)))
+                                                 styles['correct_answer']))
             else:
                 question_elements.append(Paragraph(f"{key.upper()}: {option}", normal_style))
         
@@ -717,23 +531,39 @@ def generate_report():
         question_elements.append(Paragraph(f"<b>Educational Rationale:</b> {quiz['explanation']}", normal_style))
         question_elements.append(Spacer(1, 20))
         
-        story.append(KeepTogether(question_elements))
+        yield KeepTogether(question_elements)
     
     # 6. Student Feedback Analysis (if available)
-    if feedback_analysis and numeric_summary is not None:
-        story.append(PageBreak())
-        story.append(Paragraph("6. Student Feedback Analysis", heading_style))
+    has_feedback = bool(feedback_analysis) and numeric_summary is not None
+    if has_feedback or item_stats:
+        yield PageBreak()
+        yield Paragraph("6. Student Feedback Analysis", heading_style)
+
+    if item_stats:
+        yield Paragraph("Item Analysis", subheading_style)
+        kr20 = 'n/a' if np.isnan(item_stats['kr20']) else f"{item_stats['kr20']:.2f}"
+        yield Paragraph(
+            f"{item_stats['students']} students answered; mean score {item_stats['mean_score']:.1f} of "
+            f"{item_stats['questions']}. KR-20 reliability: {kr20}. "
+            f"Difficulty is the share answering correctly; discrimination is the point-biserial "
+            f"correlation with the rest of the quiz.", normal_style)
+        item_table = Table(create_item_analysis_table(item_stats), colWidths=[55, 45, 70, 80, 85, 135])
+        item_table.setStyle(table_styles['item_analysis'])
+        yield item_table
+        yield Spacer(1, 12)
+
+    if has_feedback:
         
         # AI feedback analysis
         if ai_feedback_analysis:
             feedback_paragraphs = ai_feedback_analysis.split('\n\n')
             for paragraph in feedback_paragraphs:
                 if paragraph.strip():
-                    story.append(Paragraph(paragraph.strip(), normal_style))
-                    story.append(Spacer(1, 8))
+                    yield Paragraph(paragraph.strip(), normal_style)
+                    yield Spacer(1, 8)
         
         # Quantitative summary with enhanced formatting
-        story.append(Paragraph("Quantitative Feedback Summary", subheading_style))
+        yield Paragraph("Quantitative Feedback Summary", subheading_style)
         
         if not numeric_summary.empty:
             table_data = [['Metric', 'Mean', 'Std Dev', 'Min', 'Max', 'Interpretation']]
@@ -752,7 +582,7 @@ def generate_report():
                     interpretation = "Needs Improvement"
                 
                 table_data.append([
-                    Paragraph(col, ParagraphStyle('TableCell', fontSize=8, leading=10)),
+                    Paragraph(col, styles['table_cell']),
                     f"{stats['mean']:.2f}",
                     f"{stats['std']:.2f}",
                     f"{stats['min']:.2f}",
@@ -761,54 +591,102 @@ def generate_report():
                 ])
             
             feedback_table = Table(table_data, colWidths=[180, 50, 50, 40, 40, 80])
-            feedback_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
+            feedback_table.setStyle(table_styles['feedback'])
             
-            story.append(feedback_table)
+            yield feedback_table
     
     # 7. Recommendations
-    story.append(PageBreak())
-    story.append(Paragraph("7. Recommendations for Educational Improvement", heading_style))
-    
-    recommendations = f"""
-    <b>IMMEDIATE ACTIONS:</b><br/>
-    • Review questions with low cognitive complexity and consider adding higher-order thinking elements.<br/>
-    • Ensure balanced representation across different question types to avoid over-emphasising recall-level items.<br/>
-    • Verify that explanations provide clear learning pathways and explicitly address common misconceptions.<br/><br/>
-
-    <b>MEDIUM-TERM ENHANCEMENTS (next course run):</b><br/>
-    • Map every question to a specific learning objective and Bloom’s level to guarantee constructive alignment.<br/>
-    • Create alternative versions of the quiz to enable formative use without compromising summative integrity.<br/>
-    • Introduce short reflection prompts after difficult items to strengthen metacognitive skills.<br/><br/>
-
-    <b>LONG-TERM STRATEGY:</b><br/>
-    • Establish an item bank with analytics (difficulty, discrimination indices) to guide data-driven revisions.<br/>
-    • Combine quiz analytics with classroom performance data to personalise remediation pathways.<br/>
-    • Periodically solicit student feedback focused on assessment fairness and transparency, then iterate accordingly.
+    yield from report_styles.static_section('recommendations')
+
+def generate_report(quiz_path=None, feedback_path=None, output_path=None, cancel_check=None, quiz_id=None,
+                    results_before=None, use_cache=True, chart_quality=None):
+    """Generate the comprehensive educational PDF report.
+
+    The quiz comes from the quiz store when quiz_id is given, else from quiz_path
+    (see load_quiz_data); student results submitted after results_before (a
+    time.time() value) are left out. Other paths default to the module SETTINGS.
+    Charts and word clouds are rendered in memory (charts at chart_quality:
+    'draft', 'print' or 'vector', default CHART_QUALITY); nothing is written
+    besides the PDF. With use_cache, sections whose
+    inputs are unchanged since an earlier report are reused (see report_cache).
+    cancel_check, if given, is polled between steps and stops the build when it
+    returns True. Returns the PDF path; raises ReportError on failure.
     """
-
-    story.append(Paragraph(recommendations, normal_style))
-
+    output_path = output_path or output_filename
+    
+    # Load quiz data
+    quiz_data = load_quiz_data(quiz_path, quiz_id)
+    
+    if cancel_check and cancel_check():
+        raise ReportCancelled("Report cancelled before analysis")
+    
+    
+    section_cache = None
+    keys = {}
+    if use_cache:
+        section_cache = report_cache.SectionCache()
+        section_cache.prune()
+        keys = section_cache_keys(quiz_data, feedback_path, results_before, chart_quality)
+
+    # Independent stages overlap: the Gemini calls run on threads while charts and
+    # word clouds render on the pipeline's CPU thread (see report_pipeline)
+    print("Generating AI insights, feedback analysis and visualizations...")
+    pipeline_start = time.perf_counter()
+    stages = [
+        report_pipeline.Stage('quiz_analysis', analyze_quiz_content, args=(quiz_data,),
+                              fallback=empty_quiz_analysis()),
+        report_pipeline.Stage('ai_quiz_analysis', analyze_quiz_with_ai, args=(quiz_data,),
+                              fallback="AI analysis unavailable. Please check your Gemini API configuration."),
+        report_pipeline.Stage('feedback', load_feedback_data,
+                              args=(feedback_path, quiz_data.get('id'), results_before),
+                              fallback=({}, None, [], [])),
+        report_pipeline.Stage('item_analysis', item_analysis_stage, args=(quiz_data, results_before),
+                              fallback=None),
+        report_pipeline.Stage('ai_feedback_analysis', analyze_feedback_stage, args=(quiz_data.get('id'),),
+                              deps=('feedback',),
+                              fallback="Feedback AI analysis unavailable. Please check your Gemini API configuration."),
+        report_pipeline.Stage('charts', create_visualization_charts, args=(quiz_data, None, chart_quality),
+                              kind=report_pipeline.CPU, fallback=[]),
+        report_pipeline.Stage('wordclouds', render_wordclouds, deps=('quiz_analysis',),
+                              kind=report_pipeline.CPU, fallback=[]),
+    ]
+    for stage in stages:
+        stage.cache_key = keys.get(stage.name)
+    results, timings = report_pipeline.run_stages(stages, cache=section_cache)
+    pipeline_seconds = time.perf_counter() - pipeline_start
+    if cancel_check and cancel_check():
+        raise ReportCancelled("Report cancelled before building the PDF")
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(
+        output_path,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    
     # ---------- BUILD THE PDF ----------
     try:
-        print(f"Attempting to save PDF to: {os.path.abspath(output_filename)}")
+        print(f"Attempting to save PDF to: {os.path.abspath(output_path)}")
+        story = report_stream.StreamingStory(report_story(quiz_data, results))
         doc.build(story)
-        print(f"PDF should now exist at: {os.path.abspath(output_filename)}")
-        print(f"File exists? {os.path.exists(output_filename)}")
-        print(f"SUCCESS: Report generated – {output_filename}")
+        print(f"PDF should now exist at: {os.path.abspath(output_path)}")
+        print(f"File exists? {os.path.exists(output_path)}")
+        print(f"SUCCESS: Report generated – {output_path}")
+        return output_path
     except Exception as e:
         print(f"ERROR: Failed to generate PDF: {e}")
+        raise ReportError(f"Failed to generate PDF: {e}") from e
+    finally:
+        print(f"Report stage timings:\n{report_pipeline.format_timings(timings, pipeline_seconds)}")
 
 
 if __name__ == "__main__":
-    generate_report()
+    import sys
+    try:
+        # Optional argument: the id of a stored quiz (default: the latest one)
+        generate_report(quiz_id=sys.argv[1] if len(sys.argv) > 1 else None)
+    except ReportError:
+        raise SystemExit(1)
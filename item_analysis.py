@@ -0,0 +1,94 @@
+import numpy as np
+
+# --- SETTINGS ---
+# Classical test theory rules of thumb used to flag items in the report
+EASY_P_VALUE = 0.9
+HARD_P_VALUE = 0.3
+LOW_DISCRIMINATION = 0.2
+# Answer code for a question the student left blank (or answered with an unknown option)
+OMITTED = -1
+
+
+def response_matrix(results, quiz_questions):
+    """Students x questions matrices from a quiz_store.results_frame DataFrame.
+
+    Returns (choices, key, options): choices holds each student's option as an
+    index into options (OMITTED if blank), key the correct option index per question.
+    """
+    options = sorted({k for q in quiz_questions for k in q.get('options', {})} | {'a', 'b', 'c', 'd'})
+    codes = {option: i for i, option in enumerate(options)}
+    key = np.array([codes.get(q.get('correct'), OMITTED) for q in quiz_questions], dtype=np.int16)
+
+    num_questions = len(quiz_questions)
+    results = results[results['question_index'] < num_questions]
+    student_codes, students = results['student_id'].factorize()
+    choices = np.full((len(students), num_questions), OMITTED, dtype=np.int16)
+    answers = results['student_answer'].map(codes).fillna(OMITTED).to_numpy(dtype=np.int16)
+    choices[student_codes, results['question_index'].to_numpy()] = answers
+    return choices, key, options
+
+
+def analyze(choices, key, options):
+    """Item statistics for a students x questions choice matrix, in one vectorized pass.
+
+    p_values: share of students answering each question correctly (difficulty).
+    point_biserial: correlation of each item with the rest-of-test score (discrimination).
+    option_rates: share of students choosing each option, per question.
+    kr20: Kuder-Richardson 20 reliability of the whole quiz.
+    """
+    num_students, num_questions = choices.shape
+    correct = ((choices == key) & (key >= 0)).astype(np.float64)
+    scores = correct.sum(axis=1)
+    p_values = correct.mean(axis=0) if num_students else np.zeros(num_questions)
+
+    # Item vs rest score (total without the item), so an item isn't correlated with itself
+    rest = scores[:, None] - correct
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = (correct * rest).mean(axis=0) - p_values * rest.mean(axis=0)
+        rest_variance = (rest * rest).mean(axis=0) - rest.mean(axis=0) ** 2
+        point_biserial = covariance / np.sqrt(p_values * (1 - p_values) * rest_variance)
+    point_biserial = np.where(np.isfinite(point_biserial), point_biserial, np.nan)
+
+    option_rates = {option: (choices == i).mean(axis=0) for i, option in enumerate(options)}
+    omit_rate = (choices == OMITTED).mean(axis=0)
+
+    total_variance = scores.var()
+    if num_questions > 1 and total_variance > 0:
+        kr20 = num_questions / (num_questions - 1) * (1 - (p_values * (1 - p_values)).sum() / total_variance)
+    else:
+        kr20 = float('nan')
+
+    return {
+        'students': num_students,
+        'questions': num_questions,
+        'mean_score': float(scores.mean()) if num_students else 0.0,
+        'p_values': p_values,
+        'point_biserial': point_biserial,
+        'option_rates': option_rates,
+        'omit_rate': omit_rate,
+        'key': [options[k] if k >= 0 else None for k in key],
+        'kr20': float(kr20),
+    }
+
+
+def item_flags(p_value, discrimination):
+    """Short review notes for one item ('' when nothing stands out)."""
+    flags = []
+    if p_value >= EASY_P_VALUE:
+        flags.append('Very easy')
+    elif p_value <= HARD_P_VALUE:
+        flags.append('Very hard')
+    if np.isnan(discrimination):
+        flags.append('No variance')
+    elif discrimination < 0:
+        flags.append('Negative discrimination')
+    elif discrimination < LOW_DISCRIMINATION:
+        flags.append('Low discrimination')
+    return ', '.join(flags)
+
+
+def analyze_results(results, quiz_questions):
+    """Item analysis for a quiz's stored results, or None when nobody has answered yet."""
+    if results is None or results.empty or not quiz_questions:
+        return None
+    return analyze(*response_matrix(results, quiz_questions))
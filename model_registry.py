@@ -0,0 +1,78 @@
+import dataclasses
+import json
+import os
+import threading
+
+# --- SETTINGS ---
+CONFIG_PATH = 'classroom-ai.json'
+DEFAULT_MODEL = 'gemini-2.5-pro'
+
+# Process-wide state, guarded by _lock
+_lock = threading.Lock()
+_models = {}
+_config = None
+_config_mtime = None
+
+
+def config_key(generation_config):
+    """Turn a generation config (dict or GenerationConfig) into a hashable cache key."""
+    if generation_config is None:
+        return None
+    if dataclasses.is_dataclass(generation_config):
+        generation_config = dataclasses.asdict(generation_config)
+    config = {k: v for k, v in dict(generation_config).items() if v is not None}
+    return json.dumps(config, sort_keys=True, default=str)
+
+
+def _reload_config_if_changed():
+    """Re-read classroom-ai.json and reconfigure Gemini when the file's mtime changes.
+
+    Must be called with _lock held.
+    """
+    global _config, _config_mtime
+    # Imported on first use: google.generativeai takes about a second to import
+    import google.generativeai as genai
+    mtime = os.stat(CONFIG_PATH).st_mtime
+    if _config is not None and mtime == _config_mtime:
+        return
+    with open(CONFIG_PATH, 'r') as f:
+        config = json.load(f)
+    genai.configure(api_key=config['gemini_api_key'])
+    if _config is not None:
+        print(f"INFO: {CONFIG_PATH} changed, rebuilding Gemini models")
+    _config = config
+    _config_mtime = mtime
+    # Models hold a client bound to the old key, so drop them
+    _models.clear()
+
+
+def get_config():
+    """Return the current parsed classroom-ai.json, reloading it if it changed."""
+    with _lock:
+        _reload_config_if_changed()
+        return _config
+
+
+def get_model(model_name=DEFAULT_MODEL, generation_config=None):
+    """Return a shared GenerativeModel for (model_name, generation_config).
+
+    Models are built lazily on first use and reused across requests and threads.
+    """
+    key = (model_name, config_key(generation_config))
+    with _lock:
+        _reload_config_if_changed()
+        model = _models.get(key)
+        if model is None:
+            import google.generativeai as genai
+            model = genai.GenerativeModel(model_name, generation_config=generation_config)
+            _models[key] = model
+        return model
+
+
+def reset():
+    """Forget the cached config and models (the next get_model call rebuilds them)."""
+    global _config, _config_mtime
+    with _lock:
+        _models.clear()
+        _config = None
+        _config_mtime = None
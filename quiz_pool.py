@@ -0,0 +1,111 @@
+import json
+import queue
+import threading
+import quiz_schema
+import quiz_sharding
+import quiz_store
+
+# --- SETTINGS ---
+# Questions a pool is filled up to, and the level below which a draw triggers a refill
+POOL_TARGET_SIZE = 60
+LOW_WATERMARK = 20
+# Questions requested per background model call
+REFILL_BATCH = quiz_sharding.SHARD_SIZE
+# A question is retired after this many draws, so students of one class rarely see repeats
+MAX_SERVES = 25
+# Consecutive refill batches that add nothing (all invalid or duplicates) before giving up
+MAX_EMPTY_BATCHES = 3
+
+
+def topic_key(topic):
+    """Pool key for a lecture topic: case and whitespace don't matter."""
+    return ' '.join(topic.lower().split())
+
+
+class QuizPools:
+    """Banks of validated questions per topic, refilled by one background thread.
+
+    generate_fn(prompt, count, questions, upload, focus) must return a JSON array
+    string (backend.generate).
+    """
+
+    def __init__(self, generate_fn):
+        self.generate_fn = generate_fn
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def create(self, topic, target_size=POOL_TARGET_SIZE, class_id=None):
+        """Create (or resize) the pool for topic and start filling it."""
+        pool = quiz_store.create_pool(topic, topic_key(topic), target_size, class_id)
+        self.schedule_refill(pool['id'])
+        return pool
+
+    def draw(self, topic, count):
+        """count random questions from topic's pool, or None if there's no pool or too few questions.
+
+        Draws that leave the pool below LOW_WATERMARK queue a background refill.
+        """
+        pool = quiz_store.get_pool(topic_key=topic_key(topic))
+        if pool is None:
+            return None
+        questions = quiz_store.draw_pool_questions(pool['id'], count, MAX_SERVES)
+        available = quiz_store.count_pool_questions(pool['id'], MAX_SERVES)
+        if not questions or available < min(LOW_WATERMARK, pool['target_size']):
+            self.schedule_refill(pool['id'])
+        return questions or None
+
+    def schedule_refill(self, pool_id):
+        """Queue a refill of pool_id unless one is already queued or running."""
+        with self._lock:
+            if pool_id in self._pending:
+                return
+            self._pending.add(pool_id)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='quiz-pool-refill', daemon=True)
+                self._worker.start()
+        self._queue.put(pool_id)
+
+    def refill(self, pool_id):
+        """Generate questions until the pool reaches its target size; returns how many were added."""
+        added = 0
+        empty_batches = 0
+        batch_number = 0
+        while empty_batches < MAX_EMPTY_BATCHES:
+            pool = quiz_store.get_pool(pool_id)
+            if pool is None:
+                break
+            existing = quiz_store.pool_questions(pool_id, MAX_SERVES)
+            missing = pool['target_size'] - len(existing)
+            if missing <= 0:
+                break
+            # Rotate through cognitive levels so the bank isn't all recall questions
+            focus = quiz_sharding.BLOOM_LEVELS[batch_number % len(quiz_sharding.BLOOM_LEVELS)]
+            batch_number += 1
+            batch = json.loads(self.generate_fn(pool['topic'], min(REFILL_BATCH, missing), None, None, focus))
+            valid = [q for q in batch if isinstance(q, dict) and not quiz_schema.question_errors(q)]
+            kept = {id(q) for q in quiz_sharding.merge_questions([existing, valid])}
+            new = quiz_store.add_pool_questions(pool_id, [q for q in valid if id(q) in kept])
+            added += new
+            empty_batches = 0 if new else empty_batches + 1
+        return added
+
+    def _run(self):
+        while True:
+            pool_id = self._queue.get()
+            try:
+                added = self.refill(pool_id)
+                if added:
+                    print(f"✅ Added {added} questions to quiz pool {pool_id}")
+            except Exception as e:
+                print(f"WARNING: Refilling quiz pool {pool_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(pool_id)
+
+    def stats(self):
+        """Pools with their available question counts, and refills queued or running."""
+        with self._lock:
+            pending = len(self._pending)
+        return {'pools': quiz_store.list_pools(MAX_SERVES), 'refills_pending': pending}
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+
+# --- SETTINGS ---
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'format.JSON')
+
+
+def _to_json_schema(node):
+    """Convert the Gemini-style schema in format.JSON ("type": "OBJECT") to JSON Schema ("type": "object")."""
+    if isinstance(node, dict):
+        return {k: (v.lower() if k == 'type' and isinstance(v, str) else _to_json_schema(v)) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_to_json_schema(v) for v in node]
+    return node
+
+
+with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+    # Response schema in Gemini's format, as stored in format.JSON
+    RESPONSE_SCHEMA = json.load(f)
+
+QUESTION_SCHEMA = _to_json_schema(RESPONSE_SCHEMA['items'])
+
+# Keys Gemini's structured-output Schema accepts; JSON Schema spellings are renamed
+GEMINI_SCHEMA_KEYS = {'type', 'format', 'description', 'nullable', 'enum', 'items',
+                      'properties', 'required', 'min_items', 'max_items'}
+GEMINI_KEY_NAMES = {'minItems': 'min_items', 'maxItems': 'max_items'}
+OPTION_KEYS = ('a', 'b', 'c', 'd')
+
+
+def _to_gemini_schema(node):
+    """Drop the keys Gemini's response_schema rejects (it raises on unknown fields)."""
+    schema = {}
+    for key, value in node.items():
+        key = GEMINI_KEY_NAMES.get(key, key)
+        if key not in GEMINI_SCHEMA_KEYS:
+            continue
+        if key == 'properties':
+            value = {name: _to_gemini_schema(prop) for name, prop in value.items()}
+        elif key == 'items':
+            value = _to_gemini_schema(value)
+        schema[key] = value
+    return schema
+
+
+# format.JSON as a generation_config response_schema
+GEMINI_RESPONSE_SCHEMA = _to_gemini_schema(RESPONSE_SCHEMA)
+
+_question_validator = None
+_validator_lock = threading.Lock()
+
+
+def question_validator():
+    """Compiled question validator, built on first use (jsonschema is slow to import).
+
+    Draft7Validator is safe to share across threads.
+    """
+    global _question_validator
+    with _validator_lock:
+        if _question_validator is None:
+            from jsonschema import Draft7Validator
+            _question_validator = Draft7Validator(QUESTION_SCHEMA)
+        return _question_validator
+
+
+def question_errors(question):
+    """Return a list of schema violations for one quiz question ([] if valid)."""
+    errors = []
+    for error in question_validator().iter_errors(question):
+        location = '.'.join(str(p) for p in error.absolute_path)
+        errors.append(f"{location}: {error.message}" if location else error.message)
+    return errors
+
+
+def repair_question(question):
+    """Fix the common near-misses in a model's question, returning a new dict.
+
+    Handles option lists instead of a/b/c/d objects, upper-case or decorated option
+    letters ("B", "b)", "Option B") and stray whitespace. Anything else is left for
+    question_errors to report.
+    """
+    if not isinstance(question, dict):
+        return question
+    repaired = {k: (v.strip() if isinstance(v, str) else v) for k, v in question.items()}
+    options = repaired.get('options')
+    if isinstance(options, list) and len(options) == len(OPTION_KEYS):
+        options = dict(zip(OPTION_KEYS, options))
+    if isinstance(options, dict):
+        repaired['options'] = {str(k).strip().lower().rstrip(').'): (v.strip() if isinstance(v, str) else v)
+                               for k, v in options.items()}
+    correct = repaired.get('correct')
+    if isinstance(correct, str):
+        letter = correct.lower().removeprefix('option').strip().rstrip(').')
+        if letter in OPTION_KEYS:
+            repaired['correct'] = letter
+    return repaired
+
+
+def split_valid(questions):
+    """Repair each question and split them into (valid, [(question, errors)])."""
+    valid, invalid = [], []
+    for question in questions:
+        question = repair_question(question)
+        errors = question_errors(question)
+        if errors:
+            invalid.append((question, errors))
+        else:
+            valid.append(question)
+    return valid, invalid
@@ -0,0 +1,86 @@
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# --- SETTINGS ---
+SHARD_SIZE = 10
+MAX_CONCURRENT_SHARDS = 4
+# Question stems whose word sets overlap at least this much (Jaccard) count as duplicates
+DUPLICATE_THRESHOLD = 0.8
+
+# Each shard targets one cognitive level so shards don't all produce the same recall questions
+BLOOM_LEVELS = [
+    "Remember: recall of key facts, terms and definitions",
+    "Understand: explaining ideas and interpreting concepts",
+    "Apply: using concepts in new, concrete situations",
+    "Analyze: comparing, contrasting and breaking down ideas",
+    "Evaluate: judging approaches and justifying decisions",
+]
+
+_word_re = re.compile(r"[a-z0-9]+")
+
+
+def plan_shards(num_quizzes, shard_size=SHARD_SIZE):
+    """Split num_quizzes into near-equal shards; returns [(count, focus)]."""
+    num_shards = max(1, math.ceil(num_quizzes / shard_size))
+    base, extra = divmod(num_quizzes, num_shards)
+    return [
+        (base + (1 if i < extra else 0),
+         f"Part {i + 1} of {num_shards}. {BLOOM_LEVELS[i % len(BLOOM_LEVELS)]}")
+        for i in range(num_shards)
+    ]
+
+
+def _stem_words(question):
+    return set(_word_re.findall(str(question.get('question', '')).lower()))
+
+
+def is_near_duplicate(words, seen, threshold=DUPLICATE_THRESHOLD):
+    """True if the word set overlaps any already-kept stem by at least threshold."""
+    for other in seen:
+        union = words | other
+        if union and len(words & other) / len(union) >= threshold:
+            return True
+    return False
+
+
+def merge_questions(shard_results, limit=None, threshold=DUPLICATE_THRESHOLD):
+    """Concatenate shard outputs in order, dropping near-duplicate question stems."""
+    merged = []
+    seen = []
+    for questions in shard_results:
+        for question in questions:
+            words = _stem_words(question)
+            if is_near_duplicate(words, seen, threshold):
+                continue
+            seen.append(words)
+            merged.append(question)
+            if limit is not None and len(merged) >= limit:
+                return merged
+    return merged
+
+
+def generate_sharded(generate_fn, prompt, num_quizzes, questions=None, upload=None, shard_size=SHARD_SIZE):
+    """Generate a large quiz as concurrent smaller requests and merge them.
+
+    generate_fn(prompt, count, questions, upload, focus) must return a JSON array
+    string. If de-duplication leaves the quiz short, one top-up shard is requested.
+    """
+    def run_shard(shard):
+        count, focus = shard
+        return json.loads(generate_fn(prompt, count, questions, upload, focus))
+
+    shards = plan_shards(num_quizzes, shard_size)
+    print(f"Generating {num_quizzes} questions in {len(shards)} shards")
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_SHARDS, len(shards))) as pool:
+        shard_results = list(pool.map(run_shard, shards))
+
+    merged = merge_questions(shard_results, limit=num_quizzes)
+    shortfall = num_quizzes - len(merged)
+    if shortfall > 0:
+        print(f"Removed near-duplicates, requesting {shortfall} more questions")
+        kept = "\n".join(f"- {q.get('question', '')}" for q in merged)
+        extra = run_shard((shortfall, f"Avoid repeating any of these existing questions:\n{kept}"))
+        merged = merge_questions([merged, extra], limit=num_quizzes)
+    return merged
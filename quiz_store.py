@@ -0,0 +1,352 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# --- SETTINGS ---
+DB_PATH = os.path.join('data', 'quizzes.db')
+
+_init_lock = threading.Lock()
+_initialised = set()
+
+
+def _create_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS quizzes (
+            id TEXT PRIMARY KEY,
+            class_id TEXT,
+            prompt TEXT,
+            num_quizzes INTEGER,
+            questions TEXT,
+            quiz_questions TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    conn.execute('CREATE INDEX IF NOT EXISTS quizzes_created ON quizzes (created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS quizzes_class_created ON quizzes (class_id, created_at)')
+    # One row per student per question, clustered by quiz so a report reads one contiguous range
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS results (
+            quiz_id TEXT NOT NULL,
+            student_id TEXT NOT NULL,
+            question_index INTEGER NOT NULL,
+            question TEXT,
+            student_answer TEXT,
+            correct_answer TEXT,
+            is_correct INTEGER NOT NULL,
+            submitted_at REAL NOT NULL,
+            PRIMARY KEY (quiz_id, student_id, question_index)
+        ) WITHOUT ROWID
+    """)
+    # Question banks per lecture topic, drawn from by /generate-quiz (see quiz_pool)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pools (
+            id TEXT PRIMARY KEY,
+            topic TEXT NOT NULL,
+            topic_key TEXT NOT NULL UNIQUE,
+            class_id TEXT,
+            target_size INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pool_questions (
+            pool_id TEXT NOT NULL,
+            question_key TEXT NOT NULL,
+            question TEXT NOT NULL,
+            serves INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (pool_id, question_key)
+        ) WITHOUT ROWID
+    """)
+
+
+def connect(path=None):
+    """Open the quiz database, creating it on first use.
+
+    WAL mode lets report workers read while requests write. synchronous=NORMAL
+    means commits are not fsynced one by one; the WAL is synced at checkpoints,
+    which groups many commits into one flush. A power cut can lose the last few
+    commits but never corrupts the database.
+    """
+    path = os.path.abspath(path or DB_PATH)
+    with _init_lock:
+        if path not in _initialised:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                _create_schema(conn)
+            conn.close()
+            _initialised.add(path)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _row_to_quiz(row):
+    quiz_id, class_id, prompt, num_quizzes, questions, quiz_questions, timestamp = row
+    return {
+        "id": quiz_id,
+        "class_id": class_id,
+        "prompt": prompt,
+        "num_quizzes": num_quizzes,
+        "questions": questions,
+        "quiz_questions": json.loads(quiz_questions),
+        "timestamp": timestamp
+    }
+
+
+_COLUMNS = 'id, class_id, prompt, num_quizzes, questions, quiz_questions, timestamp'
+
+
+def save_quiz(prompt, num_quizzes, questions, quiz_questions, class_id=None):
+    """Store a generated quiz and return its id."""
+    quiz_id = uuid.uuid4().hex
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                f'INSERT INTO quizzes ({_COLUMNS}, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (quiz_id, class_id, prompt, num_quizzes, questions,
+                 json.dumps(quiz_questions, ensure_ascii=False), datetime.now().isoformat(), time.time())
+            )
+    finally:
+        conn.close()
+    return quiz_id
+
+
+def get_quiz(quiz_id):
+    """Quiz data (same shape as the old quiz_response.json, plus id and class_id), or None."""
+    conn = connect()
+    try:
+        row = conn.execute(f'SELECT {_COLUMNS} FROM quizzes WHERE id = ?', (quiz_id,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_quiz(row) if row else None
+
+
+def latest_quiz(class_id=None):
+    """Most recently generated quiz, optionally for one class, or None."""
+    quizzes = list_quizzes(class_id, limit=1, include_questions=True)
+    return quizzes[0] if quizzes else None
+
+
+def list_quizzes(class_id=None, limit=50, include_questions=False):
+    """Newest-first quizzes, optionally filtered by class."""
+    where, params = ('WHERE class_id = ?', [class_id]) if class_id else ('', [])
+    conn = connect()
+    try:
+        rows = conn.execute(
+            f'SELECT {_COLUMNS} FROM quizzes {where} ORDER BY created_at DESC LIMIT ?', params + [limit]
+        ).fetchall()
+    finally:
+        conn.close()
+    quizzes = [_row_to_quiz(row) for row in rows]
+    if not include_questions:
+        for quiz in quizzes:
+            quiz['question_count'] = len(quiz.pop('quiz_questions'))
+    return quizzes
+
+
+def save_results(quiz_id, student_id, results):
+    """Store one student's graded answers for a quiz, replacing any earlier submission.
+
+    results is a list of {"question", "student_answer", "correct_answer", "is_correct"}
+    in question order.
+    """
+    now = time.time()
+    rows = [
+        (quiz_id, student_id, index, r.get('question'), r.get('student_answer'),
+         r.get('correct_answer'), 1 if r.get('is_correct') else 0, now)
+        for index, r in enumerate(results)
+    ]
+    conn = connect()
+    try:
+        with conn:
+            conn.execute('DELETE FROM results WHERE quiz_id = ? AND student_id = ?', (quiz_id, student_id))
+            conn.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    finally:
+        conn.close()
+
+
+def _results_filter(quiz_id, submitted_before):
+    clauses, params = [], []
+    if quiz_id:
+        clauses.append('quiz_id = ?')
+        params.append(quiz_id)
+    if submitted_before is not None:
+        clauses.append('submitted_at <= ?')
+        params.append(submitted_before)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ''), params
+
+
+def results_fingerprint(quiz_id=None, submitted_before=None):
+    """Cheap summary of a result set that changes whenever a submission is added or replaced."""
+    where, params = _results_filter(quiz_id, submitted_before)
+    conn = connect()
+    try:
+        return list(conn.execute(
+            f'SELECT COUNT(*), COUNT(DISTINCT student_id), MAX(submitted_at), SUM(is_correct) FROM results {where}',
+            params
+        ).fetchone())
+    finally:
+        conn.close()
+
+
+def results_frame(quiz_id=None, submitted_before=None):
+    """Student results as a pandas DataFrame (one row per student per question).
+
+    quiz_id limits the rows to one quiz; submitted_before (a time.time() value)
+    ignores later submissions, so a queued report sees the results as they were.
+    """
+    import pandas as pd
+    where, params = _results_filter(quiz_id, submitted_before)
+    conn = connect()
+    try:
+        return pd.read_sql_query(
+            f'SELECT quiz_id, student_id, question_index, question, student_answer, correct_answer, is_correct '
+            f'FROM results {where}', conn, params=params
+        )
+    finally:
+        conn.close()
+
+
+_POOL_COLUMNS = 'id, topic, topic_key, class_id, target_size, created_at'
+
+
+def _row_to_pool(row):
+    return dict(zip(('id', 'topic', 'topic_key', 'class_id', 'target_size', 'created_at'), row))
+
+
+def create_pool(topic, topic_key, target_size, class_id=None):
+    """Pool for topic_key, created if it doesn't exist yet (an existing pool gets the new target_size)."""
+    conn = connect()
+    try:
+        with conn:
+            conn.execute(
+                f'INSERT INTO pools ({_POOL_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (topic_key) DO UPDATE SET target_size = excluded.target_size',
+                (uuid.uuid4().hex, topic, topic_key, class_id, target_size, time.time())
+            )
+        row = conn.execute(f'SELECT {_POOL_COLUMNS} FROM pools WHERE topic_key = ?', (topic_key,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_pool(row)
+
+
+def get_pool(pool_id=None, topic_key=None):
+    """Pool by id or by topic key, or None."""
+    column, value = ('id', pool_id) if pool_id else ('topic_key', topic_key)
+    conn = connect()
+    try:
+        row = conn.execute(f'SELECT {_POOL_COLUMNS} FROM pools WHERE {column} = ?', (value,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_pool(row) if row else None
+
+
+def list_pools(max_serves):
+    """Every pool with its count of questions served fewer than max_serves times."""
+    conn = connect()
+    try:
+        rows = conn.execute(
+            f'SELECT {", ".join("p." + c for c in _POOL_COLUMNS.split(", "))}, '
+            'COUNT(q.question_key) FROM pools p '
+            'LEFT JOIN pool_questions q ON q.pool_id = p.id AND q.serves < ? '
+            'GROUP BY p.id ORDER BY p.created_at', (max_serves,)
+        ).fetchall()
+    finally:
+        conn.close()
+    pools = []
+    for row in rows:
+        pool = _row_to_pool(row[:-1])
+        pool['available'] = row[-1]
+        pools.append(pool)
+    return pools
+
+
+def delete_pool(pool_id):
+    """Delete a pool and its questions; False if it didn't exist."""
+    conn = connect()
+    try:
+        with conn:
+            conn.execute('DELETE FROM pool_questions WHERE pool_id = ?', (pool_id,))
+            deleted = conn.execute('DELETE FROM pools WHERE id = ?', (pool_id,)).rowcount
+    finally:
+        conn.close()
+    return deleted > 0
+
+
+def add_pool_questions(pool_id, questions):
+    """Add questions to a pool, skipping ones already in it; returns how many were added."""
+    now = time.time()
+    rows = []
+    for question in questions:
+        text = json.dumps(question, ensure_ascii=False, sort_keys=True)
+        rows.append((pool_id, hashlib.sha256(text.encode('utf-8')).hexdigest(), text, now))
+    conn = connect()
+    try:
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO pool_questions (pool_id, question_key, question, created_at) '
+                'VALUES (?, ?, ?, ?)', rows
+            )
+            return conn.total_changes - before
+    finally:
+        conn.close()
+
+
+def pool_questions(pool_id, max_serves):
+    """Questions in a pool served fewer than max_serves times."""
+    conn = connect()
+    try:
+        rows = conn.execute(
+            'SELECT question FROM pool_questions WHERE pool_id = ? AND serves < ?', (pool_id, max_serves)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [json.loads(row[0]) for row in rows]
+
+
+def count_pool_questions(pool_id, max_serves):
+    """How many questions in a pool were served fewer than max_serves times."""
+    conn = connect()
+    try:
+        return conn.execute(
+            'SELECT COUNT(*) FROM pool_questions WHERE pool_id = ? AND serves < ?', (pool_id, max_serves)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def draw_pool_questions(pool_id, count, max_serves):
+    """count random questions served fewer than max_serves times, counting this draw.
+
+    Returns [] (and counts nothing) when the pool has fewer than count such questions.
+    The draw holds the write lock from the read to the update, so concurrent draws
+    never hand out the same serve or push a question past max_serves.
+    """
+    conn = connect()
+    try:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                'SELECT question_key, question FROM pool_questions WHERE pool_id = ? AND serves < ? '
+                'ORDER BY RANDOM() LIMIT ?', (pool_id, max_serves, count)
+            ).fetchall()
+            if len(rows) < count:
+                return []
+            conn.executemany(
+                'UPDATE pool_questions SET serves = serves + 1 WHERE pool_id = ? AND question_key = ?',
+                [(pool_id, key) for key, _ in rows]
+            )
+    finally:
+        conn.close()
+    return [json.loads(question) for _, question in rows]
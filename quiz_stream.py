@@ -0,0 +1,60 @@
+import json
+
+
+class JSONArrayStreamParser:
+    """Incrementally parse a streamed JSON array of objects.
+
+    feed() takes the next chunk of model output and returns the top-level objects
+    that were completed by it. Text before the opening '[' (e.g. a ```json fence)
+    is ignored, as is anything after the closing ']'. Objects that close but are
+    not valid JSON are collected in malformed instead of being returned.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.finished = False
+        self.malformed = []
+
+    def feed(self, chunk):
+        objects = []
+        for char in chunk:
+            if self.finished:
+                break
+            if not self._started:
+                self._started = char == '['
+                continue
+            if self._depth == 0:
+                # Between elements: only '{' starts an object, ']' ends the array
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                elif char == ']':
+                    self.finished = True
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    text = ''.join(self._buffer)
+                    self._buffer = []
+                    try:
+                        objects.append(json.loads(text))
+                    except ValueError:
+                        self.malformed.append(text)
+        return objects
@@ -0,0 +1,156 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import quiz_store
+
+# --- SETTINGS ---
+BATCH_DIR = os.path.join('reports', 'batches')
+REPORT_FILENAME = 'comprehensive_class_report.pdf'
+BATCH_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+# Quizzes picked by --all when no limit is given
+MAX_BATCH_QUIZZES = 500
+
+
+def _init_worker():
+    """Load the report stack once per worker; every report the worker builds reuses it."""
+    import generate_report
+    import wordcloud_service
+    # The batch already keeps every core busy, so word clouds render inline
+    wordcloud_service.RENDER_WORKERS = 1
+    generate_report.warm_up()
+
+
+def _build(entry, results_before):
+    """Worker entry point: build one report; returns (output_path, seconds)."""
+    import generate_report
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(entry['output_path']) or '.', exist_ok=True)
+    generate_report.generate_report(
+        entry.get('quiz_path'), entry.get('feedback_path'), entry['output_path'],
+        quiz_id=entry.get('quiz_id'), results_before=results_before,
+        chart_quality=entry.get('chart_quality')
+    )
+    return entry['output_path'], time.perf_counter() - start
+
+
+def load_manifest(path):
+    """Manifest entries from a JSON file: a list of {"quiz_id" or "quiz_path",
+    "feedback_path", "output_path", "chart_quality"}, every key optional."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        raise ValueError(f'{path} must contain a JSON list of objects')
+    return entries
+
+
+def stored_quiz_manifest(class_id=None, limit=MAX_BATCH_QUIZZES):
+    """One manifest entry per stored quiz (optionally of one class), newest first."""
+    return [{'quiz_id': quiz['id'], 'class_id': quiz['class_id']}
+            for quiz in quiz_store.list_quizzes(class_id, limit)]
+
+
+def plan(entries, batch_dir):
+    """Fill in missing output paths (one directory per report under batch_dir) and check they are distinct."""
+    planned = []
+    for index, entry in enumerate(entries, 1):
+        entry = dict(entry)
+        if not entry.get('output_path'):
+            source = entry.get('quiz_id') or os.path.splitext(os.path.basename(entry.get('quiz_path') or 'latest'))[0]
+            name = f"{index:03d}_{entry['class_id']}_{source}" if entry.get('class_id') else f"{index:03d}_{source}"
+            entry['output_path'] = os.path.join(batch_dir, name, REPORT_FILENAME)
+        planned.append(entry)
+    outputs = [os.path.abspath(e['output_path']) for e in planned]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError('Manifest entries must have distinct output paths')
+    return planned
+
+
+def run_batch(entries, workers=None, chart_quality=None, batch_dir=None):
+    """Build a report for every manifest entry across a pool of worker processes.
+
+    Workers load the report stack once and share the on-disk caches (report
+    sections, AI analyses, word clouds), so repeated inputs are computed once.
+    Student results submitted after the batch starts are left out of every
+    report. Returns a summary dict (see format_summary); failed reports are
+    listed with their error instead of stopping the batch.
+    """
+    started = time.time()
+    batch_dir = batch_dir or os.path.join(BATCH_DIR, time.strftime('%Y%m%d-%H%M%S'))
+    planned = plan(entries, batch_dir)
+    if chart_quality:
+        for entry in planned:
+            entry.setdefault('chart_quality', chart_quality)
+    workers = max(1, min(workers or BATCH_WORKERS, len(planned) or 1))
+    reports = []
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker) as executor:
+        futures = {executor.submit(_build, entry, started): entry for entry in planned}
+        for future in as_completed(futures):
+            entry = futures[future]
+            report = {'quiz_id': entry.get('quiz_id'), 'quiz_path': entry.get('quiz_path'),
+                      'output_path': entry['output_path'], 'status': 'succeeded', 'seconds': None, 'error': None}
+            try:
+                _, report['seconds'] = future.result()
+            except Exception as e:
+                report['status'] = 'failed'
+                report['error'] = str(e)
+                print(f"WARNING: Report for {entry.get('quiz_id') or entry.get('quiz_path') or 'latest quiz'} failed: {e}")
+            reports.append(report)
+    wall_seconds = time.perf_counter() - wall_start
+    succeeded = sum(1 for r in reports if r['status'] == 'succeeded')
+    order = {entry['output_path']: i for i, entry in enumerate(planned)}
+    reports.sort(key=lambda r: order[r['output_path']])
+    return {
+        'batch_dir': batch_dir,
+        'workers': workers,
+        'reports': reports,
+        'succeeded': succeeded,
+        'failed': len(reports) - succeeded,
+        'wall_seconds': round(wall_seconds, 2),
+        'reports_per_minute': round(succeeded / wall_seconds * 60, 1) if wall_seconds > 0 else 0.0,
+    }
+
+
+def format_summary(summary):
+    """Human-readable run summary with the batch throughput."""
+    lines = [f"{'STATUS':<10} {'SECONDS':>8}  REPORT"]
+    for report in summary['reports']:
+        seconds = f"{report['seconds']:.1f}" if report['seconds'] is not None else '-'
+        detail = report['output_path'] if report['status'] == 'succeeded' else f"{report['output_path']} ({report['error']})"
+        lines.append(f"{report['status']:<10} {seconds:>8}  {detail}")
+    lines.append(
+        f"{summary['succeeded']} succeeded, {summary['failed']} failed in {summary['wall_seconds']:.1f}s "
+        f"with {summary['workers']} workers: {summary['reports_per_minute']} reports/minute"
+    )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate many class reports in one run.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('manifest', nargs='?', help='JSON list of {quiz_id|quiz_path, feedback_path, output_path}')
+    source.add_argument('--all', action='store_true', help='one report per stored quiz')
+    parser.add_argument('--class-id', help='with --all, only quizzes of this class')
+    parser.add_argument('--limit', type=int, default=MAX_BATCH_QUIZZES, help='with --all, at most this many quizzes')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS)
+    parser.add_argument('--quality', choices=('draft', 'print', 'vector'), help='chart quality profile')
+    parser.add_argument('--output-dir', help=f'where reports without an output_path go (default {BATCH_DIR}/<time>)')
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args()
+
+    entries = stored_quiz_manifest(args.class_id, args.limit) if args.all else load_manifest(args.manifest)
+    if not entries:
+        print("INFO: Nothing to do: the manifest is empty")
+        return
+    summary = run_batch(entries, args.workers, args.quality, args.output_dir)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    if summary['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
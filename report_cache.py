@@ -0,0 +1,73 @@
+import os
+import pickle
+import shutil
+import time
+import uuid
+import response_cache
+
+# --- SETTINGS ---
+CACHE_DIR = os.path.join('cache', 'report_sections')
+CACHE_TTL_SECONDS = 30 * 24 * 3600
+# Bump when a section's code changes, so sections computed by older code are not reused
+SECTION_CACHE_VERSION = 2
+RESULT_FILE = 'result.pkl'
+
+MISS = object()
+
+
+def section_key(*parts):
+    """Cache key for a section from the content of its inputs."""
+    return response_cache.make_key('section', SECTION_CACHE_VERSION, *parts)
+
+
+class SectionCache:
+    """On-disk cache of report section results, one directory per (section, key)."""
+
+    def __init__(self, directory=None, ttl_seconds=CACHE_TTL_SECONDS):
+        self.directory = directory or CACHE_DIR
+        self.ttl_seconds = ttl_seconds
+
+    def _entry_dir(self, section, key):
+        return os.path.join(self.directory, section, key)
+
+    def get(self, section, key):
+        """The cached result, or MISS."""
+        entry_dir = self._entry_dir(section, key)
+        try:
+            if time.time() - os.path.getmtime(entry_dir) > self.ttl_seconds:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return MISS
+            with open(os.path.join(entry_dir, RESULT_FILE), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return MISS
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable cached section '{section}': {e}")
+            return MISS
+
+    def set(self, section, key, result):
+        """Store a section result; concurrent writers of the same entry keep the first one."""
+        entry_dir = self._entry_dir(section, key)
+        tmp_dir = f"{entry_dir}.tmp{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, RESULT_FILE), 'wb') as f:
+                pickle.dump(result, f)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Another report stored this section first
+            pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def prune(self):
+        """Delete entries older than ttl_seconds."""
+        now = time.time()
+        if not os.path.isdir(self.directory):
+            return
+        for section in os.scandir(self.directory):
+            if not section.is_dir():
+                continue
+            for entry in os.scandir(section.path):
+                if now - entry.stat().st_mtime > self.ttl_seconds:
+                    shutil.rmtree(entry.path, ignore_errors=True)
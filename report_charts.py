@@ -0,0 +1,180 @@
+import io
+import threading
+from collections import defaultdict
+import matplotlib
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+import report_stream
+
+# --- SETTINGS ---
+# 'draft' is for previews and per-submission rebuilds, 'print' for reports that get printed;
+# 'vector' draws the charts with ReportLab itself (sharp at any zoom, no rasterizing at all)
+QUALITY_PROFILES = {
+    'draft': {'format': 'png', 'dpi': 100},
+    'print': {'format': 'png', 'dpi': 300},
+    'vector': {'format': 'vector'},
+}
+DEFAULT_QUALITY = 'print'
+# Display size of a chart in the PDF
+CHART_WIDTH = 6 * inch
+CHART_HEIGHT = 4 * inch
+
+# Loaded once; rc_context applies it per chart without re-reading the style file
+CHART_STYLE = dict(matplotlib.style.library['seaborn-v0_8'])
+# Matplotlib's Set3 colors, used by both renderers
+SET3 = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3', '#fdb462',
+        '#b3de69', '#fccde5', '#d9d9d9', '#bc80bd', '#ccebc5', '#ffed6f']
+
+
+def question_type(question_text):
+    """Wh-word category of a question stem."""
+    text = question_text.lower()
+    for word in ('what', 'how', 'why', 'which', 'when'):
+        if word in text:
+            return word.capitalize()
+    return 'Other'
+
+
+def chart_specs(quiz_data):
+    """What to draw for a quiz: one dict per chart with its title, bars and colors."""
+    questions = quiz_data['quiz_questions']
+    specs = []
+    question_types = defaultdict(int)
+    for quiz in questions:
+        question_types[question_type(quiz['question'])] += 1
+    if question_types:
+        specs.append({
+            'name': 'question_types_chart',
+            'title': 'Distribution of Question Types',
+            'xlabel': 'Question Type',
+            'ylabel': 'Number of Questions',
+            'labels': list(question_types.keys()),
+            'values': list(question_types.values()),
+            'colors': [SET3[i % len(SET3)] for i in range(len(question_types))],
+            'value_format': '{:.0f}',
+            'figsize': (8, 6),
+        })
+    # Question complexity: explanation length plus option wording, normalized
+    if len(questions) > 1:
+        specs.append({
+            'name': 'question_complexity_chart',
+            'title': 'Question Complexity Analysis',
+            'xlabel': 'Questions',
+            'ylabel': 'Complexity Score',
+            'labels': [f'Q{i}' for i in range(1, len(questions) + 1)],
+            'values': [(len(quiz['explanation'].split())
+                        + sum(len(opt.split()) for opt in quiz.get('options', {}).values())) / 10
+                       for quiz in questions],
+            'colors': ['lightblue'] * len(questions),
+            'edgecolor': 'navy',
+            'alpha': 0.7,
+            'grid': True,
+            'value_format': '{:.1f}',
+            'figsize': (10, 6),
+        })
+    return specs
+
+
+class FigurePool:
+    """Reusable Agg figures by size, so each chart doesn't build a new figure and canvas.
+
+    Uses the object-oriented API only (no pyplot), so figures are never registered
+    with a GUI backend and threads can render concurrently on different figures.
+    """
+
+    def __init__(self):
+        self._free = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def acquire(self, figsize):
+        with self._lock:
+            if self._free[figsize]:
+                return self._free[figsize].pop()
+        figure = Figure(figsize=figsize)
+        FigureCanvasAgg(figure)
+        return figure
+
+    def release(self, figure, figsize):
+        figure.clear()
+        with self._lock:
+            self._free[figsize].append(figure)
+
+
+_figures = FigurePool()
+
+
+def render_png(spec, dpi):
+    """PNG bytes of one chart."""
+    figure = _figures.acquire(spec['figsize'])
+    try:
+        with matplotlib.rc_context(CHART_STYLE):
+            ax = figure.add_subplot()
+            bars = ax.bar(spec['labels'], spec['values'], color=spec['colors'],
+                          edgecolor=spec.get('edgecolor'), alpha=spec.get('alpha'))
+            ax.set_title(spec['title'], fontsize=14, fontweight='bold')
+            ax.set_ylabel(spec['ylabel'])
+            ax.set_xlabel(spec['xlabel'])
+            if spec.get('grid'):
+                ax.grid(axis='y', alpha=0.3)
+            for bar in bars:
+                height = bar.get_height()
+                ax.text(bar.get_x() + bar.get_width() / 2., height,
+                        spec['value_format'].format(height), ha='center', va='bottom')
+            figure.tight_layout()
+            buffer = io.BytesIO()
+            # tight_layout already fits the axes, so the extra draw of bbox_inches='tight' is skipped
+            figure.savefig(buffer, format='png', dpi=dpi)
+        return buffer.getvalue()
+    finally:
+        _figures.release(figure, spec['figsize'])
+
+
+def render_drawing(spec, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """The chart as a ReportLab Drawing (vector graphics, embedded as-is)."""
+    drawing = Drawing(width, height)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 50, 45
+    chart.width, chart.height = width - 70, height - 85
+    chart.data = [spec['values']]
+    chart.categoryAxis.categoryNames = spec['labels']
+    chart.categoryAxis.labels.fontSize = 7 if len(spec['labels']) > 15 else 9
+    chart.valueAxis.valueMin = 0
+    if spec.get('grid'):
+        chart.valueAxis.visibleGrid = True
+        chart.valueAxis.gridStrokeColor = colors.lightgrey
+    for i, color in enumerate(spec['colors']):
+        chart.bars[(0, i)].fillColor = colors.toColor(color)
+        chart.bars[(0, i)].strokeColor = colors.toColor(spec.get('edgecolor', color))
+    chart.barLabelFormat = lambda value: spec['value_format'].format(value)
+    chart.barLabels.nudge = 7
+    chart.barLabels.fontSize = 8
+    drawing.add(chart)
+    drawing.add(String(width / 2, height - 20, spec['title'], fontName='Helvetica-Bold',
+                       fontSize=14, textAnchor='middle'))
+    drawing.add(String(width / 2, 8, spec['xlabel'], fontSize=10, textAnchor='middle'))
+    # Rotated a quarter turn, reading bottom to top like matplotlib's y label
+    ylabel = Group(String(0, 0, spec['ylabel'], fontSize=10, textAnchor='middle'))
+    ylabel.transform = (0, 1, -1, 0, 14, chart.y + chart.height / 2)
+    drawing.add(ylabel)
+    return drawing
+
+
+def render(spec, quality=DEFAULT_QUALITY):
+    """One rendered chart: {'name', 'format', 'data', 'dpi'}; data is PNG bytes, or the spec for vector charts."""
+    profile = QUALITY_PROFILES[quality]
+    if profile['format'] == 'vector':
+        # Drawings are cheap to build, so vector charts keep the spec and are drawn at layout time
+        return {'name': spec['name'], 'format': 'vector', 'data': spec}
+    return {'name': spec['name'], 'format': 'png', 'data': render_png(spec, profile['dpi']), 'dpi': profile['dpi']}
+
+
+def flowable(chart, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """ReportLab flowable for a rendered chart, downsampled to the profile's dpi at its display size."""
+    if chart['format'] == 'vector':
+        return render_drawing(chart['data'], width, height)
+    return report_stream.embedded_image(chart['data'], width, height, chart.get('dpi', report_stream.EMBED_DPI))
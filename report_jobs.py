@@ -0,0 +1,248 @@
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import quiz_store
+
+# --- SETTINGS ---
+REPORTS_DIR = 'reports'
+REPORT_FILENAME = 'comprehensive_class_report.pdf'
+# Inputs snapshotted into each job's directory. Quizzes come from quiz_store;
+# QUIZ_PATH is the legacy single-quiz file, used only when the store is empty
+QUIZ_PATH = 'quiz_response.json'
+QUIZ_SNAPSHOT = 'quiz.json'
+FEEDBACK_PATH = 'dbtt_class_feedback.csv'
+CANCEL_MARKER = '.cancel'
+MAX_WORKERS = 2
+MAX_PENDING_JOBS = 20
+JOB_RETENTION_SECONDS = 24 * 3600
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLING = 'cancelling'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class QueueFullError(Exception):
+    """Raised when MAX_PENDING_JOBS reports are already queued or running."""
+
+
+class MissingInputError(Exception):
+    """Raised when there is no quiz to build a report from (or quiz_id is unknown)."""
+
+
+_lock = threading.Lock()
+_jobs = {}
+_futures = {}
+_executor = None
+
+
+def _get_executor():
+    """Create the worker pool on first use.
+
+    Workers are separate processes because matplotlib, wordcloud and ReportLab are
+    CPU-bound and not thread-safe. 'spawn' keeps them clear of the server's threads.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+    return _executor
+
+
+def _init_worker():
+    """Render word clouds inline: MAX_WORKERS job processes already use the cores,
+    and a render pool per job would oversubscribe them."""
+    import wordcloud_service
+    wordcloud_service.RENDER_WORKERS = 1
+
+
+def _run_report(quiz_path, feedback_path, output_path, results_before=None):
+    """Worker entry point: build one report and return its PDF path.
+
+    generate_report.ReportError propagates to the job with its real message.
+    """
+    # Imported here so the web process never loads the report stack
+    import generate_report
+    cancel_marker = os.path.join(os.path.dirname(output_path), CANCEL_MARKER)
+    return generate_report.generate_report(
+        quiz_path, feedback_path, output_path,
+        cancel_check=lambda: os.path.exists(cancel_marker),
+        results_before=results_before
+    )
+
+
+def _snapshot(job):
+    """Public view of a job record, with 'running' derived from its future."""
+    job = dict(job)
+    future = _futures.get(job['id'])
+    if job['status'] == QUEUED and job['cancel_requested']:
+        job['status'] = CANCELLING
+    elif job['status'] == QUEUED and future is not None and future.running():
+        job['status'] = RUNNING
+    return job
+
+
+def _on_done(job_id, future):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job['finished_at'] = time.time()
+        if future.cancelled():
+            job['status'] = CANCELLED
+        elif job['cancel_requested']:
+            # The worker finished after the job was cancelled: drop its output
+            job['status'] = CANCELLED
+            shutil.rmtree(job['output_dir'], ignore_errors=True)
+        elif future.exception() is not None:
+            job['status'] = FAILED
+            job['error'] = str(future.exception())
+        else:
+            job['status'] = SUCCEEDED
+        _futures.pop(job_id, None)
+    print(f"INFO: Report job {job_id} {job['status']}")
+
+
+def _prune(now):
+    """Forget finished jobs older than JOB_RETENTION_SECONDS and delete their output."""
+    for job_id, job in list(_jobs.items()):
+        if job['status'] in FINISHED_STATES and now - job['finished_at'] > JOB_RETENTION_SECONDS:
+            shutil.rmtree(job['output_dir'], ignore_errors=True)
+            del _jobs[job_id]
+
+
+def _snapshot_inputs(output_dir, quiz_id, quiz_path, feedback_path):
+    """Copy the report inputs into the job directory so later writes can't change the job.
+
+    Student results are not copied; the worker reads only those submitted before the job.
+    """
+    job_quiz_path = os.path.join(output_dir, QUIZ_SNAPSHOT)
+    if quiz_path:
+        quiz_data = None
+    elif quiz_id:
+        quiz_data = quiz_store.get_quiz(quiz_id)
+        if quiz_data is None:
+            raise MissingInputError(f'Quiz not found: {quiz_id}')
+    else:
+        quiz_data = quiz_store.latest_quiz()
+        quiz_path = QUIZ_PATH if quiz_data is None else None
+    if quiz_data is not None:
+        with open(job_quiz_path, 'w', encoding='utf-8') as f:
+            json.dump(quiz_data, f, ensure_ascii=False)
+    elif os.path.exists(quiz_path):
+        shutil.copyfile(quiz_path, job_quiz_path)
+    else:
+        raise MissingInputError(f'Quiz response file not found: {quiz_path}')
+    feedback_path = feedback_path or FEEDBACK_PATH
+    # Feedback is optional; a path that doesn't exist gives a quiz-only report
+    job_feedback_path = os.path.join(output_dir, os.path.basename(feedback_path))
+    if os.path.exists(feedback_path):
+        shutil.copyfile(feedback_path, job_feedback_path)
+    return job_quiz_path, job_feedback_path, quiz_data['id'] if quiz_data else None
+
+
+def submit(quiz_id=None, quiz_path=None, feedback_path=None):
+    """Snapshot the report inputs, queue the build and return its job record immediately.
+
+    The quiz is quiz_id from the quiz store, else the JSON file quiz_path, else the
+    latest stored quiz.
+    """
+    global _executor
+    now = time.time()
+    job_id = uuid.uuid4().hex
+    output_dir = os.path.join(REPORTS_DIR, job_id)
+    job = {
+        'id': job_id,
+        'status': QUEUED,
+        'created_at': now,
+        'finished_at': None,
+        'output_dir': output_dir,
+        'output_path': os.path.join(output_dir, REPORT_FILENAME),
+        'error': None,
+        'cancel_requested': False,
+        'quiz_id': quiz_id,
+    }
+    with _lock:
+        _prune(now)
+        pending = sum(1 for j in _jobs.values() if j['status'] not in FINISHED_STATES)
+        if pending >= MAX_PENDING_JOBS:
+            raise QueueFullError(f'{pending} report jobs already pending')
+        os.makedirs(output_dir, exist_ok=True)
+        try:
+            quiz_path, feedback_path, job['quiz_id'] = _snapshot_inputs(output_dir, quiz_id, quiz_path, feedback_path)
+        except Exception:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
+        _jobs[job_id] = job
+        try:
+            future = _get_executor().submit(_run_report, quiz_path, feedback_path, job['output_path'], now)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool
+            print("WARNING: Report worker pool was broken, restarting it")
+            _executor = None
+            future = _get_executor().submit(_run_report, quiz_path, feedback_path, job['output_path'], now)
+        _futures[job_id] = future
+        snapshot = _snapshot(job)
+    # Registered outside the lock: the callback runs immediately if the future is already done
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return snapshot
+
+
+def get(job_id):
+    """Return a job record, or None if the id is unknown."""
+    with _lock:
+        job = _jobs.get(job_id)
+        return _snapshot(job) if job is not None else None
+
+
+def cancel(job_id):
+    """Cancel a job.
+
+    Queued jobs never start. A running job reports 'cancelling' and its worker
+    stops at the next check in generate_report (a cancel marker file in the job
+    directory); any output it still produces is discarded.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        future = _futures.get(job_id)
+        if job['status'] not in FINISHED_STATES:
+            job['cancel_requested'] = True
+            with open(os.path.join(job['output_dir'], CANCEL_MARKER), 'w'):
+                pass
+        snapshot = _snapshot(job)
+    if future is not None:
+        future.cancel()
+    return get(job_id) or snapshot
+
+
+def latest_succeeded():
+    """Most recently finished successful job, or None."""
+    with _lock:
+        done = [j for j in _jobs.values() if j['status'] == SUCCEEDED]
+        if not done:
+            return None
+        return _snapshot(max(done, key=lambda j: j['finished_at']))
+
+
+def shutdown(wait=True):
+    """Stop the worker pool (pending jobs are cancelled)."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
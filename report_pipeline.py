@@ -0,0 +1,102 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import report_cache
+
+# --- SETTINGS ---
+IO_WORKERS = 4
+
+# Stage kinds
+IO = 'io'
+CPU = 'cpu'
+# Reported in timings for stages served from the section cache
+CACHED = 'hit'
+
+
+class Stage:
+    """One step of the report pipeline.
+
+    func is called as func(*args, *dependency_results) once every stage named in
+    deps has finished. IO stages (Gemini calls, file loads) run concurrently on
+    threads. CPU stages (charts, word clouds) run one at a time on their own
+    thread, which overlaps them with the IO waits while keeping matplotlib
+    single-threaded. If func raises, the stage result is fallback.
+
+    With a cache_key (a hash of everything the stage's result depends on) and a
+    cache passed to run_stages, a stored result is reused instead of calling func.
+    Fallback results are never stored.
+    """
+
+    def __init__(self, name, func, args=(), deps=(), kind=IO, fallback=None, cache_key=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = tuple(deps)
+        self.kind = kind
+        self.fallback = fallback
+        self.cache_key = cache_key
+
+
+def _timed(stage, args, cache=None):
+    """Run one stage; returns (result, kind, seconds)."""
+    start = time.perf_counter()
+    use_cache = cache is not None and stage.cache_key is not None
+    if use_cache:
+        result = cache.get(stage.name, stage.cache_key)
+        if result is not report_cache.MISS:
+            return result, CACHED, time.perf_counter() - start
+    try:
+        result = stage.func(*args)
+    except Exception as e:
+        print(f"WARNING: Report stage '{stage.name}' failed: {e}")
+        return stage.fallback, stage.kind, time.perf_counter() - start
+    if use_cache:
+        try:
+            cache.set(stage.name, stage.cache_key, result)
+        except Exception as e:
+            print(f"WARNING: Could not cache report stage '{stage.name}': {e}")
+    return result, stage.kind, time.perf_counter() - start
+
+
+def run_stages(stages, cache=None):
+    """Run stages as soon as their dependencies are done and return (results, timings).
+
+    cache is an optional report_cache.SectionCache for stages with a cache_key.
+    timings maps each stage name to (kind, seconds spent in the stage), with kind
+    CACHED for stages served from the cache.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+
+    results = {}
+    timings = {}
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='report-io') as io_pool, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-cpu') as cpu_lane:
+        while pending or running:
+            ready = [s for s in pending if all(dep in results for dep in s.deps)]
+            if not ready and not running:
+                raise ValueError(f"Dependency cycle between stages: {[s.name for s in pending]}")
+            for stage in ready:
+                pending.remove(stage)
+                args = stage.args + tuple(results[dep] for dep in stage.deps)
+                pool = cpu_lane if stage.kind == CPU else io_pool
+                running[pool.submit(_timed, stage, args, cache)] = stage
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage.name], kind, elapsed = future.result()
+                timings[stage.name] = (kind, elapsed)
+    return results, timings
+
+
+def format_timings(timings, wall_seconds):
+    """Human-readable per-stage timing summary."""
+    lines = [f"  {name:<20} {kind:<4} {seconds:7.2f}s" for name, (kind, seconds) in timings.items()]
+    busy = sum(seconds for _, seconds in timings.values())
+    lines.append(f"  {'total (wall)':<20} {'':<4} {wall_seconds:7.2f}s  (stage sum {busy:.2f}s)")
+    return '\n'.join(lines)
@@ -0,0 +1,60 @@
+import io
+from PIL import Image as PILImage
+from reportlab.platypus import Image
+
+# --- SETTINGS ---
+# Flowables kept ahead of the one being laid out (keepWithNext chains must fit)
+STORY_LOOKAHEAD = 32
+# Images are downsampled to this resolution at their display size unless told otherwise
+EMBED_DPI = 200
+
+
+class StreamingStory(list):
+    """A story for doc.build() that pulls flowables from an iterable as layout needs them.
+
+    ReportLab lays out a story from the front, deleting each flowable once it is
+    placed, and only looks a few flowables ahead (keepWithNext). Handing it this
+    list instead of the whole story means only STORY_LOOKAHEAD flowables exist at
+    once, so sections (and their images) are built while the previous ones are
+    already on the page and freed.
+    """
+
+    def __init__(self, flowables, lookahead=STORY_LOOKAHEAD):
+        super().__init__()
+        self._source = iter(flowables)
+        self.lookahead = lookahead
+        self.peak = 0
+        self._refill()
+
+    def _refill(self):
+        while self._source is not None and list.__len__(self) < self.lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        self.peak = max(self.peak, list.__len__(self))
+
+    def __len__(self):
+        self._refill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._refill()
+        return list.__getitem__(self, index)
+
+
+def embedded_image(data, width, height, max_dpi=EMBED_DPI):
+    """ReportLab Image for PNG bytes, downsampled to max_dpi at width x height points.
+
+    Images already at or below that resolution are embedded unchanged (never upsampled).
+    """
+    max_pixels = (round(width / 72 * max_dpi), round(height / 72 * max_dpi))
+    with PILImage.open(io.BytesIO(data)) as image:
+        if image.width > max_pixels[0] or image.height > max_pixels[1]:
+            image = image.resize(
+                (min(image.width, max_pixels[0]), min(image.height, max_pixels[1])), PILImage.LANCZOS
+            )
+            buffer = io.BytesIO()
+            image.save(buffer, format='PNG', optimize=False)
+            data = buffer.getvalue()
+    return Image(io.BytesIO(data), width=width, height=height)
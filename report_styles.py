@@ -0,0 +1,183 @@
+import copy
+import threading
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, PageBreak, Spacer, TableStyle
+
+TOC_ITEMS = [
+    "1. Quiz Content Analysis",
+    "2. Educational Quality Assessment",
+    "3. AI-Powered Pedagogical Insights",
+    "4. Visual Analytics",
+    "5. Individual Question Analysis",
+    "6. Student Feedback Analysis (if available)",
+    "7. Recommendations for Improvement"
+]
+
+RECOMMENDATIONS = """
+<b>IMMEDIATE ACTIONS:</b><br/>
+• Review questions with low cognitive complexity and consider adding higher-order thinking elements.<br/>
+• Ensure balanced representation across different question types to avoid over-emphasising recall-level items.<br/>
+• Verify that explanations provide clear learning pathways and explicitly address common misconceptions.<br/><br/>
+
+<b>MEDIUM-TERM ENHANCEMENTS (next course run):</b><br/>
+• Map every question to a specific learning objective and Bloom’s level to guarantee constructive alignment.<br/>
+• Create alternative versions of the quiz to enable formative use without compromising summative integrity.<br/>
+• Introduce short reflection prompts after difficult items to strengthen metacognitive skills.<br/><br/>
+
+<b>LONG-TERM STRATEGY:</b><br/>
+• Establish an item bank with analytics (difficulty, discrimination indices) to guide data-driven revisions.<br/>
+• Combine quiz analytics with classroom performance data to personalise remediation pathways.<br/>
+• Periodically solicit student feedback focused on assessment fairness and transparency, then iterate accordingly.
+"""
+
+_lock = threading.Lock()
+_styles = None
+_table_styles = None
+_static = None
+
+
+def _build_styles():
+    base = getSampleStyleSheet()
+    normal = ParagraphStyle(
+        'CustomNormal',
+        parent=base['Normal'],
+        alignment=TA_JUSTIFY,
+        spaceBefore=6,
+        spaceAfter=6
+    )
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=base['Heading1'],
+            fontSize=22,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=colors.darkblue
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=base['Heading2'],
+            fontSize=16,
+            spaceAfter=15,
+            spaceBefore=20,
+            keepWithNext=True,
+            textColor=colors.darkblue,
+            borderWidth=1,
+            borderColor=colors.lightgrey,
+            borderPadding=5
+        ),
+        'subheading': ParagraphStyle(
+            'CustomSubHeading',
+            parent=base['Heading3'],
+            fontSize=14,
+            spaceAfter=10,
+            spaceBefore=15,
+            keepWithNext=True,
+            textColor=colors.darkgreen
+        ),
+        'normal': normal,
+        # Executive summary box on the title page
+        'summary': ParagraphStyle(
+            'Summary',
+            parent=base['Normal'],
+            fontSize=10,
+            leading=12,
+            leftIndent=20,
+            rightIndent=20,
+            spaceBefore=10,
+            spaceAfter=10,
+            borderWidth=1,
+            borderColor=colors.grey,
+            borderPadding=10,
+            backColor=colors.lightblue
+        ),
+        'correct_answer': ParagraphStyle('CorrectAnswer', parent=normal, textColor=colors.darkgreen),
+        'table_cell': ParagraphStyle('TableCell', fontSize=8, leading=10),
+    }
+
+
+def _build_table_styles():
+    return {
+        'quiz': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'item_analysis': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ]),
+        'feedback': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ]),
+    }
+
+
+def _build_static(styles):
+    table_of_contents = [Paragraph("Table of Contents", styles['heading'])]
+    table_of_contents += [Paragraph(item, styles['normal']) for item in TOC_ITEMS]
+    table_of_contents.append(PageBreak())
+    return {
+        'title': [Paragraph("Educational Assessment Analysis Report", styles['title']), Spacer(1, 20)],
+        'table_of_contents': table_of_contents,
+        'recommendations': [
+            PageBreak(),
+            Paragraph("7. Recommendations for Educational Improvement", styles['heading']),
+            Paragraph(RECOMMENDATIONS, styles['normal']),
+        ],
+    }
+
+
+def get_styles():
+    """Paragraph styles of the report, built once per process."""
+    global _styles
+    with _lock:
+        if _styles is None:
+            _styles = _build_styles()
+        return _styles
+
+
+def get_table_styles():
+    """TableStyles of the report tables ('quiz', 'item_analysis', 'feedback'), built once per process."""
+    global _table_styles
+    with _lock:
+        if _table_styles is None:
+            _table_styles = _build_table_styles()
+        return _table_styles
+
+
+def static_section(name):
+    """Flowables of a section that is the same in every report ('title', 'table_of_contents', 'recommendations').
+
+    The paragraphs are parsed once per process; each call returns shallow copies,
+    so layout state from one build never leaks into another.
+    """
+    global _static
+    styles = get_styles()
+    with _lock:
+        if _static is None:
+            _static = _build_static(styles)
+        return [copy.copy(flowable) for flowable in _static[name]]
@@ -0,0 +1,137 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_key(*parts):
+    """Hash arbitrary JSON-serialisable parts into a stable cache key."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Persistent SQLite cache for model responses with TTL, LRU eviction and a size cap.
+
+    Entries can carry a tag (e.g. a quiz id) so related entries can be dropped together.
+    """
+
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    tag TEXT
+                )
+            """)
+            # Caches created before tags existed
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(entries)')]
+            if 'tag' not in columns:
+                conn.execute('ALTER TABLE entries ADD COLUMN tag TEXT')
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_tag ON entries (tag)')
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection for one transaction: committed (or rolled back) and closed on exit."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute('SELECT value, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._count('evictions')
+                row = None
+            if row is None:
+                self._count('misses')
+                return None
+            conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return row[0]
+
+    def set(self, key, value, tag=None):
+        """Store value under key, then evict expired and least recently used entries."""
+        now = time.time()
+        # bytes values (rendered images) are stored as BLOBs and come back as bytes
+        size = len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access, tag) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, value, size, now, now, tag)
+            )
+            self._evict(conn, now)
+        self._count('writes')
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def delete_tag(self, tag):
+        """Drop every entry stored with tag; returns how many were removed."""
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM entries WHERE tag = ?', (tag,)).rowcount
+
+    def _evict(self, conn, now):
+        evicted = conn.execute('DELETE FROM entries WHERE created_at < ?', (now - self.ttl_seconds,)).rowcount
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total > self.max_bytes:
+            rows = conn.execute('SELECT key, size FROM entries ORDER BY last_access ASC').fetchall()
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            conn.executemany('DELETE FROM entries WHERE key = ?', stale)
+            evicted += len(stale)
+        if evicted:
+            self._count('evictions', evicted)
+
+    def stats(self):
+        """Hit/miss counters for this process plus current entry count and size."""
+        with self._connect() as conn:
+            entries, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['entries'] = entries
+        stats['size_bytes'] = total
+        return stats
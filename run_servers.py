@@ -1,27 +1,62 @@
 import subprocess
 import sys
 import time
+import urllib.error
+import urllib.request
 
 # Adjust these as needed
-BACKEND_COMMAND = [sys.executable, "backend.py"]  # or "app.py"
+BACKEND_COMMAND = [sys.executable, "serve.py"]  # or [sys.executable, "backend.py"] for the Flask dev server
 FRONTEND_COMMAND = ["npm", "run", "dev"]  # or "yarn start" if you use Yarn
 FRONTEND_PATH = "."
+READY_URL = "http://127.0.0.1:5011/ready"
+READY_TIMEOUT_SECONDS = 60
+SHUTDOWN_TIMEOUT_SECONDS = 35
 
-# Start the backend
-backend_proc = subprocess.Popen(BACKEND_COMMAND)
-print("Flask backend started.")
 
-# Optionally, wait a bit to ensure backend is ready
-time.sleep(3)
+def wait_until_ready(proc, url=READY_URL, timeout=READY_TIMEOUT_SECONDS):
+    """Poll the backend's readiness endpoint; True once it answers 200."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.2)
+    return False
 
-# Start the frontend
-frontend_proc = subprocess.Popen(FRONTEND_COMMAND, cwd=FRONTEND_PATH)
-print("React frontend started.")
 
-try:
-    backend_proc.wait()
-    frontend_proc.wait()
-except KeyboardInterrupt:
-    print("Shutting down...")
-    backend_proc.terminate()
-    frontend_proc.terminate()
\ No newline at end of file
+def main():
+    # Start the backend in its own session so Ctrl+C reaches it only as the single
+    # SIGTERM below (a second signal makes serve.py stop without draining)
+    backend_proc = subprocess.Popen(BACKEND_COMMAND, start_new_session=True)
+    if not wait_until_ready(backend_proc):
+        print("ERROR: Backend did not become ready.")
+        backend_proc.terminate()
+        sys.exit(1)
+    print("Flask backend ready.")
+
+    # Start the frontend
+    frontend_proc = subprocess.Popen(FRONTEND_COMMAND, cwd=FRONTEND_PATH)
+    print("React frontend started.")
+
+    try:
+        backend_proc.wait()
+        frontend_proc.wait()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+        # SIGTERM lets serve.py finish in-flight requests first
+        backend_proc.terminate()
+        frontend_proc.terminate()
+        for proc in (backend_proc, frontend_proc):
+            try:
+                proc.wait(timeout=SHUTDOWN_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import signal
+import threading
+import time
+import _thread
+from waitress import create_server
+from werkzeug.wsgi import ClosingIterator
+import backend
+import report_jobs
+
+# --- SETTINGS ---
+HOST = os.environ.get('BACKEND_HOST', '127.0.0.1')
+PORT = int(os.environ.get('BACKEND_PORT', 5011))
+# Enough threads for every endpoint limit plus headroom for health, readiness and job polling
+THREADS = int(os.environ.get('BACKEND_THREADS', sum(backend.ENDPOINT_LIMITS.values()) + 8))
+# How long in-flight requests get to finish after SIGTERM/SIGINT
+SHUTDOWN_GRACE_SECONDS = 30
+
+
+class InFlightCounter:
+    """WSGI middleware counting requests whose responses haven't been fully sent."""
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _done(self):
+        with self._lock:
+            self.count -= 1
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.count += 1
+        try:
+            return ClosingIterator(self.app(environ, start_response), self._done)
+        except BaseException:
+            self._done()
+            raise
+
+    def wait_idle(self, timeout):
+        """Block until no request is in flight or timeout passes; True if idle."""
+        deadline = time.time() + timeout
+        while self.count > 0 and time.time() < deadline:
+            time.sleep(0.1)
+        return self.count <= 0
+
+
+def _drain_and_stop(counter, grace_seconds):
+    if not counter.wait_idle(grace_seconds):
+        print(f"WARNING: Stopping with {counter.count} requests still in flight")
+    # Re-enters the signal handler in the main thread, which stops the waitress loop
+    _thread.interrupt_main()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the quiz backend with waitress.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--threads', type=int, default=THREADS)
+    parser.add_argument('--grace', type=float, default=SHUTDOWN_GRACE_SECONDS,
+                        help='seconds to let in-flight requests finish on shutdown')
+    args = parser.parse_args()
+
+    counter = InFlightCounter(backend.app)
+    server = create_server(counter, host=args.host, port=args.port, threads=args.threads)
+    stopping = threading.Event()
+
+    def on_signal(signum, frame):
+        if stopping.is_set():
+            # A second signal, or the drain thread once requests have finished: stop now
+            raise KeyboardInterrupt
+        stopping.set()
+        print(f"INFO: Received signal {signum}, draining (up to {args.grace:.0f}s)")
+        # /ready now returns 503, so load balancers stop sending new requests
+        backend.start_draining()
+        threading.Thread(target=_drain_and_stop, args=(counter, args.grace), daemon=True).start()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    print(f"✅ Backend serving on http://{args.host}:{args.port} with {args.threads} threads")
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        # Queued reports are cancelled; running ones finish
+        report_jobs.shutdown(wait=True)
+        print("INFO: Backend stopped")
+
+
+if __name__ == '__main__':
+    main()
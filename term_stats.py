@@ -0,0 +1,58 @@
+import heapq
+import string
+from collections import Counter
+
+_STOP_WORD_TEXT = """
+a about above after again against all am an and any are aren't as at be because been before being below between
+both but by can't cannot could couldn't did didn't do does doesn't doing don't down during each few for from
+further had hadn't has hasn't have haven't having he he'd he'll he's her here here's hers herself him himself his
+how how's i i'd i'll i'm i've if in into is isn't it it's its itself let's me more most mustn't my myself no nor
+not of off on once only or other ought our ours ourselves out over own same shan't she she'd she'll she's should
+shouldn't so some such than that that's the their theirs them themselves then there there's these they they'd
+they'll they're they've this those through to too under until up very was wasn't we we'd we'll we're we've were
+weren't what what's when when's where where's which while who who's whom why why's with won't would wouldn't you
+you'd you'll you're you've your yours yourself yourselves
+"""
+
+# Built once: deletes ASCII punctuation in a single str.translate call
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+# Stop words as they look after punctuation is removed ("don't" -> "dont") as well as before
+STOP_WORDS = frozenset(_STOP_WORD_TEXT.split()) | frozenset(w.translate(PUNCTUATION_TABLE) for w in _STOP_WORD_TEXT.split())
+MIN_WORD_LENGTH = 3
+
+
+def tokens(text, stop_words=STOP_WORDS, min_length=MIN_WORD_LENGTH):
+    """Lowercase words of text without punctuation, stop words or words shorter than min_length."""
+    if not isinstance(text, str):
+        # NaN cells from pandas, None, numbers
+        if text is None or text != text:
+            return []
+        text = str(text)
+    return [w for w in text.lower().translate(PUNCTUATION_TABLE).split()
+            if len(w) >= min_length and w not in stop_words]
+
+
+class TermCounter:
+    """Running word counts that can be updated as new text arrives."""
+
+    def __init__(self, texts=(), stop_words=STOP_WORDS, min_length=MIN_WORD_LENGTH):
+        self.counts = Counter()
+        self.stop_words = stop_words
+        self.min_length = min_length
+        self.update_many(texts)
+
+    def update(self, text):
+        self.counts.update(tokens(text, self.stop_words, self.min_length))
+
+    def update_many(self, texts):
+        for text in texts:
+            self.update(text)
+
+    def top(self, k):
+        """The k most frequent words as {word: count}, most frequent first (ties alphabetical)."""
+        return dict(heapq.nsmallest(k, self.counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def top_terms(texts, k):
+    """Top-k word counts over an iterable of texts."""
+    return TermCounter(texts).top(k)
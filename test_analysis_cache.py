@@ -0,0 +1,38 @@
+import analysis_cache
+import model_registry
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content_async(self, prompt):
+        self.prompts.append(prompt)
+        return FakeResponse(f"analysis of {prompt}")
+
+
+def test_analysis_calls_are_memoized_and_invalidated_per_quiz(tmp_path, monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(analysis_cache, 'ANALYSIS_CACHE_PATH', str(tmp_path / 'analysis.db'))
+    monkeypatch.setattr(analysis_cache, '_cache', None)
+    monkeypatch.setattr(model_registry, 'get_model', lambda name, config=None: model)
+    monkeypatch.setattr(model_registry, 'get_config', lambda: {'gemini_api_key': 'test-key'})
+
+    assert analysis_cache.generate_text('quiz one', tag='q1') == 'analysis of quiz one'
+    assert analysis_cache.generate_text('quiz one', tag='q1') == 'analysis of quiz one'
+    analysis_cache.generate_text('quiz two', tag='q2')
+    assert model.prompts == ['quiz one', 'quiz two']
+
+    # A different generation config is a different call
+    analysis_cache.generate_text('quiz one', generation_config={'temperature': 0.1})
+    assert len(model.prompts) == 3
+
+    assert analysis_cache.invalidate('q1') == 1
+    analysis_cache.generate_text('quiz one', tag='q1')
+    analysis_cache.generate_text('quiz two', tag='q2')
+    assert model.prompts[3:] == ['quiz one']
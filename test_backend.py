@@ -0,0 +1,205 @@
+import io
+import os
+import json
+import time
+import backend
+import model_registry
+import response_cache
+
+QUIZ = [{
+    "question": "What is 2 + 2?",
+    "options": {"a": "3", "b": "4", "c": "5", "d": "22"},
+    "correct": "b",
+    "explanation": "Adding two and two gives four."
+}]
+
+
+def _isolate(tmp_path, monkeypatch, calls):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(backend, '_quiz_cache', response_cache.ResponseCache(str(tmp_path / 'quizzes.db'), 3600, 1 << 20))
+
+    def fake_generate(prompt, num_quizzes, questions=None, upload=None, focus=None):
+        calls.append(prompt)
+        return json.dumps(QUIZ)
+
+    monkeypatch.setattr(backend, 'generate', fake_generate)
+    return backend.app.test_client()
+
+
+def test_generate_quiz_is_served_from_cache(tmp_path, monkeypatch):
+    calls = []
+    client = _isolate(tmp_path, monkeypatch, calls)
+    form = {'prompt': 'addition', 'num_quizzes': '1'}
+
+    first = client.post('/generate-quiz', data=form)
+    second = client.post('/generate-quiz', data=form)
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json['cached'] is False
+    assert second.json['cached'] is True
+    assert second.json['quiz_questions'] == QUIZ
+    assert len(calls) == 1
+    # Every response is stored as its own quiz for reports
+    assert first.json['quiz_id'] != second.json['quiz_id']
+    stored = client.get(f"/quizzes/{first.json['quiz_id']}")
+    assert stored.status_code == 200 and stored.json['quiz_questions'] == QUIZ
+    assert client.get('/quizzes/missing').status_code == 404
+
+    graded = client.post(f"/quizzes/{first.json['quiz_id']}/results",
+                         json={'student_id': 'amy', 'student_answers': {'1': 'b'}})
+    assert graded.status_code == 200 and graded.json['correct'] == 1
+    assert client.post('/quizzes/missing/results', json={'student_id': 'amy', 'student_answers': {}}).status_code == 404
+
+    client.post('/generate-quiz', data=dict(form, cache='refresh'))
+    client.post('/generate-quiz', data=dict(form, cache='bypass'))
+    assert len(calls) == 3
+    assert client.post('/generate-quiz', data=dict(form, cache='bogus')).status_code == 400
+    assert client.get('/').json['quiz_cache']['hits'] == 1
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingModel:
+    def __init__(self, text, chunk_size=7):
+        self.chunks = [FakeChunk(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+
+    async def generate_content_async(self, contents, stream=False):
+        assert stream
+        return FakeStream(self.chunks)
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_generate_quiz_stream_emits_valid_questions(tmp_path, monkeypatch):
+    client = _isolate(tmp_path, monkeypatch, [])
+    bad = {"question": "Missing the rest"}
+    text = '```json\n' + json.dumps(QUIZ + [bad] + QUIZ) + '\n```'
+    monkeypatch.setattr(model_registry, 'get_model', lambda *args, **kwargs: FakeStreamingModel(text))
+    monkeypatch.setattr(model_registry, 'get_config', lambda: {'gemini_api_key': 'test-key'})
+    completed = backend.gemini_client.stats()['completed']
+
+    response = client.post('/generate-quiz/stream', data={'prompt': 'addition', 'num_quizzes': '3'})
+    events = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+
+    assert [e['type'] for e in events] == ['question', 'invalid', 'question', 'done']
+    assert events[0]['question'] == QUIZ[0]
+    assert events[2]['index'] == 1
+    assert events[-1]['count'] == 2
+    # The stream releases its concurrency slot when the server closes it
+    response.close()
+    assert backend.concurrency_stats()['quiz']['in_use'] == 0
+    # The model call went through gemini_client and gave back its in-flight slot
+    time.sleep(0.1)
+    stats = backend.gemini_client.stats()
+    assert stats['completed'] == completed + 1 and stats['in_flight'] == 0
+
+
+def test_uploads_are_keyed_by_content_and_cleaned_up(tmp_path, monkeypatch):
+    calls = []
+    client = _isolate(tmp_path, monkeypatch, calls)
+    monkeypatch.setitem(backend.app.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+    def post(content, name):
+        form = {'prompt': 'addition', 'num_quizzes': '1', 'file': (io.BytesIO(content), name)}
+        return client.post('/generate-quiz', data=form, content_type='multipart/form-data')
+
+    assert post(b'deck one', 'a.pdf').json['cached'] is False
+    # Same bytes under another name hit the cache; different bytes don't
+    assert post(b'deck one', 'b.pdf').json['cached'] is True
+    assert post(b'deck two', 'a.pdf').json['cached'] is False
+    assert len(calls) == 2
+    assert not [f for f in os.listdir(tmp_path) if f.endswith('.pdf')]
+
+
+def test_endpoint_limits_and_readiness(tmp_path, monkeypatch):
+    import threading
+    client = _isolate(tmp_path, monkeypatch, [])
+    monkeypatch.setattr(backend, 'LIMIT_WAIT_SECONDS', 0)
+    monkeypatch.setattr(backend, '_limit_semaphores', {'quiz': threading.BoundedSemaphore(1),
+                                                       'report': threading.BoundedSemaphore(1)})
+    monkeypatch.setattr(backend, '_draining', threading.Event())
+
+    backend._limit_semaphores['quiz'].acquire()  # another request is generating
+    busy = client.post('/generate-quiz', data={'prompt': 'addition', 'num_quizzes': '1'})
+    assert busy.status_code == 503 and busy.headers['Retry-After']
+    # Other endpoints are unaffected
+    assert client.get('/').status_code == 200
+    backend._limit_semaphores['quiz'].release()
+    assert client.post('/generate-quiz', data={'prompt': 'addition', 'num_quizzes': '1'}).status_code == 200
+    # The slot was released after the request
+    assert backend._limit_semaphores['quiz'].acquire(blocking=False)
+
+    assert client.get('/ready').status_code == 200
+    backend.start_draining()
+    assert client.get('/ready').status_code == 503
+
+
+def test_generate_quiz_draws_from_a_topic_pool(tmp_path, monkeypatch):
+    calls = []
+    client = _isolate(tmp_path, monkeypatch, calls)
+    monkeypatch.setattr(backend.quiz_pools, 'schedule_refill', lambda pool_id: None)
+    bank = [dict(QUIZ[0], question=f"What is {n} + {n}? (variant {n})") for n in range(6)]
+    monkeypatch.setattr(backend.quiz_pools, 'generate_fn', lambda *args: json.dumps(bank))
+
+    assert client.post('/pools', json={'topic': ''}).status_code == 400
+    created = client.post('/pools', json={'topic': 'Addition', 'target_size': 6})
+    assert created.status_code == 202
+    backend.quiz_pools.refill(created.json['id'])
+
+    drawn = client.post('/generate-quiz', data={'prompt': 'addition', 'num_quizzes': '4'})
+    assert drawn.status_code == 200 and drawn.json['pooled'] is True
+    assert len(drawn.json['quiz_questions']) == 4 and calls == []
+    assert json.loads(drawn.json['raw_response']) == drawn.json['quiz_questions']
+    # Student questions need a tailored quiz, so they bypass the pool
+    tailored = client.post('/generate-quiz', data={'prompt': 'addition', 'num_quizzes': '1', 'questions': 'why?'})
+    assert tailored.json['pooled'] is False and len(calls) == 1
+
+    assert client.get('/pools').json['pools'][0]['available'] == 6
+    assert client.delete(f"/pools/{created.json['id']}").status_code == 200
+    assert client.delete(f"/pools/{created.json['id']}").status_code == 404
+
+
+def test_generate_repairs_and_regenerates_only_failing_questions(monkeypatch):
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    good = [dict(QUIZ[0], question=f"What is {n} + {n}?") for n in range(3)]
+    fixable = dict(QUIZ[0], question="What is 5 + 5?", correct="B)", options=["3", "10", "5", "22"])
+    broken = {"question": "What is 6 + 6?", "options": {"a": "12"}, "correct": "a"}
+    replies = [
+        Response(json.dumps([good[0], fixable, broken, good[1]])[:-1] + ', {"question": "cut off'),
+        Response(json.dumps([good[2]])),
+    ]
+    prompts = []
+
+    def fake_generate_content(model_name, contents, generation_config=None):
+        assert generation_config['response_mime_type'] == 'application/json'
+        prompts.append(contents)
+        return replies.pop(0)
+
+    monkeypatch.setattr(backend.gemini_client, 'generate_content', fake_generate_content)
+    quiz = json.loads(backend.generate('addition', 4))
+    assert [q['question'] for q in quiz] == ['What is 0 + 0?', 'What is 5 + 5?', 'What is 1 + 1?', 'What is 2 + 2?']
+    assert quiz[1]['correct'] == 'b' and quiz[1]['options']['b'] == '10'
+    # The second call asks only for the one question that failed
+    assert 'Generate 1 high-quality' in prompts[1] and 'What is 5 + 5?' in prompts[1]
+
+
+def test_num_quizzes_out_of_range_is_rejected(tmp_path, monkeypatch):
+    calls = []
+    client = _isolate(tmp_path, monkeypatch, calls)
+    for value in ('0', '-3', str(backend.MAX_QUIZ_QUESTIONS + 1), 'many'):
+        for url in ('/generate-quiz', '/generate-quiz/stream'):
+            response = client.post(url, data={'prompt': 'addition', 'num_quizzes': value})
+            assert response.status_code == 400, (url, value)
+    assert calls == []
@@ -0,0 +1,57 @@
+import zipfile
+import extraction
+import uploads
+
+SLIDE = """<?xml version="1.0" encoding="UTF-8"?>
+<p:sld xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"
+       xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">
+  <p:cSld><p:spTree><p:sp><p:txBody>
+    <a:p><a:r><a:t>{title}</a:t></a:r></a:p>
+    <a:p><a:r><a:t>{body}</a:t></a:r></a:p>
+  </p:txBody></p:sp></p:spTree></p:cSld>
+</p:sld>"""
+
+
+def _pptx(path, slides):
+    with zipfile.ZipFile(path, 'w') as z:
+        for number, (title, body) in enumerate(slides, 1):
+            z.writestr(f'ppt/slides/slide{number}.xml', SLIDE.format(title=title, body=body))
+
+
+def test_pptx_slides_are_extracted_in_order_and_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(extraction, 'CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / 'deck.pptx'
+    # slide10 must sort after slide2
+    _pptx(path, [(f'Title {i}', f'Body {i}') for i in range(1, 11)])
+    upload = uploads.SpooledUpload(str(path), 'deck.pptx', path.stat().st_size, 'abc123', 'application/octet-stream')
+
+    chunks = extraction.extract_chunks(upload)
+    assert chunks[0] == 'Slide 1:\nTitle 1\nBody 1'
+    assert chunks[-1] == 'Slide 10:\nTitle 10\nBody 10'
+
+    # The second call is served from the cache even if the file is gone
+    path.unlink()
+    assert extraction.extract_chunks(upload) == chunks
+
+
+def test_unsupported_types_fall_back_to_the_file(tmp_path):
+    upload = uploads.SpooledUpload(str(tmp_path / 'x.png'), 'x.png', 0, 'def', 'image/png')
+    assert extraction.extract_chunks(upload) is None
+
+
+def test_select_chunks_keeps_relevant_chunks_within_budget():
+    chunks = [
+        'Introduction to the course and assessment policy.',
+        'Photosynthesis converts light energy into chemical energy in chloroplasts.',
+        'Cellular respiration releases energy from glucose in mitochondria.',
+        'Revision tips and office hours.',
+    ]
+    selected = extraction.select_chunks(chunks, 'quiz on photosynthesis and chloroplasts', token_budget=20)
+    assert selected == [chunks[1]]
+    assert extraction.select_chunks(chunks, 'anything', token_budget=10000) == chunks
+
+
+def test_chunk_sections_respects_max_chars():
+    chunks = extraction.chunk_sections(['a' * 50 + '\n\n' + 'b' * 50, 'c' * 130], max_chars=60)
+    assert all(len(c) <= 60 for c in chunks)
+    assert ''.join(chunks) == 'a' * 50 + 'b' * 50 + 'c' * 130
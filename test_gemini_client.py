@@ -0,0 +1,46 @@
+import asyncio
+import time
+import gemini_client
+import model_registry
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+class FlakyModel:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def generate_content_async(self, contents):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise QuotaError('Resource has been exhausted')
+        return f"response to {contents}"
+
+
+def test_token_bucket_waits_for_refill():
+    async def take():
+        bucket = gemini_client.TokenBucket(600)  # 10 tokens per second
+        assert await bucket.acquire(600) == 0
+        start = time.monotonic()
+        await bucket.acquire(2)
+        return time.monotonic() - start
+
+    assert 0.15 <= asyncio.run(take()) < 1
+
+
+def test_quota_errors_are_retried_with_backoff(monkeypatch):
+    model = FlakyModel(failures=2)
+    monkeypatch.setattr(model_registry, 'get_model', lambda name, config=None: model)
+    monkeypatch.setattr(model_registry, 'get_config', lambda: {'gemini_api_key': 'test-key'})
+    monkeypatch.setattr(gemini_client, 'RETRY_INITIAL_SECONDS', 0.01)
+    monkeypatch.setattr(gemini_client, 'RETRY_MAX_SECONDS', 0.02)
+    retries = gemini_client.stats()['retries']
+
+    assert gemini_client.generate_content('gemini-2.5-pro', 'hello') == 'response to hello'
+    assert model.calls == 3
+    stats = gemini_client.stats()
+    assert stats['retries'] == retries + 2
+    assert stats['in_flight'] == 0 and stats['queued'] == 0
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+# Modules that must only load when a quiz or report actually needs them
+HEAVY_MODULES = {
+    'google.generativeai', 'jsonschema', 'pypdf', 'numpy', 'pandas',
+    'matplotlib', 'seaborn', 'wordcloud', 'reportlab', 'generate_report',
+}
+
+
+def _import_profile(module):
+    """{module: cumulative microseconds} from `python -X importtime -c 'import module'`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def test_backend_import_defers_heavy_modules():
+    profile = _import_profile('backend')
+    assert 'backend' in profile
+    loaded = {name for name in profile if any(name == m or name.startswith(m + '.') for m in HEAVY_MODULES)}
+    assert not loaded, f"backend imports heavy modules at startup: {sorted(loaded)}"
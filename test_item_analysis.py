@@ -0,0 +1,52 @@
+import time
+import numpy as np
+import pandas as pd
+import item_analysis
+
+QUESTIONS = [
+    {"question": f"Question {i}?", "options": {"a": "1", "b": "2", "c": "3", "d": "4"}, "correct": "b",
+     "explanation": "Because."} for i in range(3)
+]
+
+
+def _results(answers):
+    rows = [
+        {"student_id": student, "question_index": i, "student_answer": answer}
+        for student, row in answers.items() for i, answer in enumerate(row)
+    ]
+    return pd.DataFrame(rows)
+
+
+def test_item_statistics_match_hand_computed_values():
+    results = _results({
+        'amy': ['b', 'b', 'b'],
+        'ben': ['b', 'b', 'a'],
+        'cat': ['b', 'a', 'a'],
+        'dan': ['a', 'c', None],
+    })
+    stats = item_analysis.analyze_results(results, QUESTIONS)
+    assert stats['students'] == 4
+    assert np.allclose(stats['p_values'], [0.75, 0.5, 0.25])
+    assert np.allclose(stats['option_rates']['a'], [0.25, 0.25, 0.5])
+    assert np.allclose(stats['omit_rate'], [0, 0, 0.25])
+    # Scores 3, 2, 1, 0: variance 1.25, sum of pq = 0.1875 + 0.25 + 0.1875
+    assert np.isclose(stats['kr20'], 1.5 * (1 - 0.625 / 1.25))
+    # Every item separates strong from weak students here
+    assert (stats['point_biserial'] > 0).all()
+    assert item_analysis.item_flags(0.95, 0.05) == 'Very easy, Low discrimination'
+    assert item_analysis.analyze_results(results.iloc[:0], QUESTIONS) is None
+
+
+def test_analysis_is_fast_for_large_classes():
+    rng = np.random.default_rng(0)
+    ability = rng.normal(size=(10000, 1))
+    difficulty = rng.normal(size=(1, 100))
+    correct = rng.random((10000, 100)) < 1 / (1 + np.exp(difficulty - ability))
+    key = np.full(100, 1, dtype=np.int16)
+    choices = np.where(correct, 1, rng.choice([0, 2, 3], size=correct.shape)).astype(np.int16)
+
+    start = time.perf_counter()
+    stats = item_analysis.analyze(choices, key, ['a', 'b', 'c', 'd'])
+    assert time.perf_counter() - start < 1.0
+    assert stats['kr20'] > 0.8
+    assert (stats['point_biserial'] > 0).all()
@@ -0,0 +1,27 @@
+import json
+import os
+import model_registry
+
+
+def _write_config(path, api_key, mtime):
+    with open(path, 'w') as f:
+        json.dump({'gemini_api_key': api_key}, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_models_are_shared_and_reloaded(tmp_path, monkeypatch):
+    config_path = tmp_path / 'classroom-ai.json'
+    _write_config(config_path, 'key-one', 1_000_000)
+    monkeypatch.setattr(model_registry, 'CONFIG_PATH', str(config_path))
+    model_registry.reset()
+
+    first = model_registry.get_model('gemini-2.5-pro', {'temperature': 0.5})
+    assert model_registry.get_model('gemini-2.5-pro', {'temperature': 0.5}) is first
+    assert model_registry.get_model('gemini-2.5-pro', {'temperature': 0.2}) is not first
+    assert model_registry.get_config()['gemini_api_key'] == 'key-one'
+
+    # Touching the config file rebuilds models with the new key
+    _write_config(config_path, 'key-two', 2_000_000)
+    assert model_registry.get_model('gemini-2.5-pro', {'temperature': 0.5}) is not first
+    assert model_registry.get_config()['gemini_api_key'] == 'key-two'
+    model_registry.reset()
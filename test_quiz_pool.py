@@ -0,0 +1,70 @@
+import json
+import quiz_pool
+import quiz_store
+
+WORDS = ['photosynthesis', 'mitochondria', 'osmosis', 'enzymes', 'chlorophyll', 'ribosomes',
+         'diffusion', 'meiosis', 'glycolysis', 'transpiration', 'cytoplasm', 'nucleus']
+
+
+def fake_generate(prompt, count, questions=None, upload=None, focus=None):
+    """Distinct valid questions, plus one invalid question per batch."""
+    fake_generate.calls += 1
+    batch = [{
+        "question": f"Which statement about {WORDS[(fake_generate.made + i) % len(WORDS)]} "
+                    f"variant {fake_generate.made + i} is correct?",
+        "options": {"a": "One", "b": "Two", "c": "Three", "d": "Four"},
+        "correct": "a",
+        "explanation": "Because it is."
+    } for i in range(count)]
+    fake_generate.made += count
+    return json.dumps(batch + [{"question": "broken"}])
+
+
+def test_pools_fill_serve_random_draws_and_retire_questions(tmp_path, monkeypatch):
+    monkeypatch.setattr(quiz_store, 'DB_PATH', str(tmp_path / 'quizzes.db'))
+    monkeypatch.setattr(quiz_pool, 'MAX_SERVES', 2)
+    fake_generate.calls = fake_generate.made = 0
+    pools = quiz_pool.QuizPools(fake_generate)
+    monkeypatch.setattr(pools, 'schedule_refill', lambda pool_id: scheduled.append(pool_id))
+    scheduled = []
+
+    assert pools.draw('Cell Biology', 5) is None
+    pool = pools.create('Cell Biology', target_size=12)
+    assert scheduled == [pool['id']]
+    assert pools.refill(pool['id']) == 12
+    assert fake_generate.calls == 2
+    assert pools.refill(pool['id']) == 0
+
+    # Topic lookup ignores case and spacing; each draw is distinct questions
+    first = pools.draw('  cell   biology ', 5)
+    assert len(first) == 5 and len({q['question'] for q in first}) == 5
+    assert len(scheduled) == 1
+
+    # 12 questions x 2 serves allow 24 drawn questions; the rest of the draws come up short
+    drawn = [pools.draw('Cell Biology', 5) for _ in range(4)]
+    assert [d is None for d in drawn] == [False, False, False, True]
+    assert len(scheduled) > 1
+    assert pools.stats()['pools'][0]['available'] < quiz_pool.LOW_WATERMARK
+
+
+def test_concurrent_draws_never_exceed_max_serves(tmp_path, monkeypatch):
+    import threading
+    monkeypatch.setattr(quiz_store, 'DB_PATH', str(tmp_path / 'quizzes.db'))
+    fake_generate.calls = fake_generate.made = 0
+    pool = quiz_store.create_pool('Cell Biology', 'cell biology', 20)
+    quiz_store.add_pool_questions(pool['id'], json.loads(fake_generate('Cell Biology', 20))[:20])
+    barrier = threading.Barrier(8)
+    drawn = []
+
+    def draw():
+        barrier.wait()
+        for _ in range(3):
+            drawn.extend(q['question'] for q in quiz_store.draw_pool_questions(pool['id'], 2, 1))
+
+    threads = [threading.Thread(target=draw) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # One serve per question: every question handed out exactly once
+    assert len(drawn) == 20 and len(set(drawn)) == 20
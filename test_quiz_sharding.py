@@ -0,0 +1,42 @@
+import json
+import threading
+import quiz_sharding
+
+
+def _question(stem):
+    return {"question": stem, "options": {"a": "1", "b": "2", "c": "3", "d": "4"}, "correct": "a", "explanation": "e"}
+
+
+def test_plan_shards_splits_evenly():
+    shards = quiz_sharding.plan_shards(25, shard_size=10)
+    assert [count for count, _ in shards] == [9, 8, 8]
+    assert all(focus.startswith(f"Part {i + 1} of 3") for i, (_, focus) in enumerate(shards))
+
+
+def test_merge_drops_near_duplicates():
+    merged = quiz_sharding.merge_questions([
+        [_question("What is the capital of France?"), _question("Define photosynthesis.")],
+        [_question("What is the capital of France"), _question("Why do leaves change colour?")],
+    ])
+    assert [q["question"] for q in merged] == [
+        "What is the capital of France?", "Define photosynthesis.", "Why do leaves change colour?"
+    ]
+
+
+def test_generate_sharded_runs_shards_concurrently_and_tops_up():
+    barrier = threading.Barrier(3, timeout=5)
+    calls = []
+
+    def fake_generate(prompt, count, questions, upload, focus):
+        calls.append((count, focus))
+        if len(calls) <= 3:
+            barrier.wait()
+            # Every shard repeats the same first question
+            stems = ["What is a shared question?"] + [f"Shard{focus[5]} topic{i} concept{i} detail{i}" for i in range(count - 1)]
+        else:
+            stems = [f"Extra topic{i} concept{i} detail{i}" for i in range(count)]
+        return json.dumps([_question(s) for s in stems])
+
+    merged = quiz_sharding.generate_sharded(fake_generate, "topic", 30, shard_size=10)
+    assert len(merged) == 30
+    assert len(calls) == 4 and calls[3][0] == 2
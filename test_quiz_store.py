@@ -0,0 +1,56 @@
+import quiz_store
+
+QUESTIONS = [{
+    "question": "What is 2 + 2?",
+    "options": {"a": "3", "b": "4", "c": "5", "d": "22"},
+    "correct": "b",
+    "explanation": "Adding two and two gives four."
+}]
+
+
+def test_quizzes_are_stored_by_id_and_class(tmp_path, monkeypatch):
+    monkeypatch.setattr(quiz_store, 'DB_PATH', str(tmp_path / 'data' / 'quizzes.db'))
+    assert quiz_store.latest_quiz() is None
+
+    first = quiz_store.save_quiz('addition', 1, None, QUESTIONS, class_id='math-1')
+    second = quiz_store.save_quiz('subtraction', 1, 'what is minus?', QUESTIONS, class_id='math-2')
+    assert first != second
+
+    quiz = quiz_store.get_quiz(first)
+    assert quiz['prompt'] == 'addition'
+    assert quiz['class_id'] == 'math-1'
+    assert quiz['quiz_questions'] == QUESTIONS
+    assert quiz_store.get_quiz('missing') is None
+
+    assert quiz_store.latest_quiz()['id'] == second
+    assert quiz_store.latest_quiz('math-1')['id'] == first
+    listed = quiz_store.list_quizzes()
+    assert [q['id'] for q in listed] == [second, first]
+    assert listed[0]['question_count'] == 1 and 'quiz_questions' not in listed[0]
+
+    conn = quiz_store.connect()
+    try:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    finally:
+        conn.close()
+
+
+def test_results_are_stored_per_quiz_and_aggregated(tmp_path, monkeypatch):
+    import generate_report
+    monkeypatch.setattr(quiz_store, 'DB_PATH', str(tmp_path / 'quizzes.db'))
+    quiz_id = quiz_store.save_quiz('addition', 1, None, QUESTIONS)
+    other_id = quiz_store.save_quiz('subtraction', 1, None, QUESTIONS)
+    graded = lambda ok: [{"question": "What is 2 + 2?", "student_answer": "b" if ok else "a",
+                          "correct_answer": "b", "is_correct": ok}]
+    quiz_store.save_results(quiz_id, 'amy', graded(False))
+    quiz_store.save_results(quiz_id, 'amy', graded(True))  # resubmission replaces
+    quiz_store.save_results(quiz_id, 'ben', graded(False))
+    quiz_store.save_results(other_id, 'cat', graded(True))
+
+    frame = quiz_store.results_frame(quiz_id)
+    assert sorted(frame['student_id']) == ['amy', 'ben']
+    assert quiz_store.results_frame(quiz_id, submitted_before=0).empty
+
+    analysis, summary, _, _ = generate_report.load_feedback_data(str(tmp_path / 'none.csv'), quiz_id)
+    assert analysis['Student Quiz Performance'] == {"What is 2 + 2?": {'correct': 1, 'wrong': 1}}
+    assert summary is not None
@@ -0,0 +1,11 @@
+import quiz_stream
+
+
+def test_objects_are_emitted_as_they_close():
+    parser = quiz_stream.JSONArrayStreamParser()
+    assert parser.feed('Here you go:\n[{"question": "a \\"}{\\" b", "n": [1, ') == []
+    assert parser.feed('2]}, {"question"') == [{"question": 'a "}{" b', "n": [1, 2]}]
+    assert parser.feed(': "c"}, {"bad": }]') == [{"question": "c"}]
+    assert parser.malformed == ['{"bad": }']
+    assert parser.finished
+    assert parser.feed('[{"ignored": true}]') == []
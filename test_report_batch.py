@@ -0,0 +1,25 @@
+import os
+import pytest
+import quiz_store
+import report_batch
+from test_report_jobs import QUIZ_DATA
+
+
+def test_batch_builds_every_report_and_reports_failures(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = quiz_store.save_quiz('addition', 2, None, QUIZ_DATA['quiz_questions'], class_id='math-1')
+    second = quiz_store.save_quiz('doubling', 2, None, QUIZ_DATA['quiz_questions'], class_id='math-2')
+    entries = report_batch.stored_quiz_manifest() + [{'quiz_id': 'missing'}]
+    assert {e['quiz_id'] for e in entries[:2]} == {first, second}
+
+    summary = report_batch.run_batch(entries, workers=2, chart_quality='draft', batch_dir='out')
+    assert [r['status'] for r in summary['reports']] == ['succeeded', 'succeeded', 'failed']
+    assert 'Quiz not found' in summary['reports'][2]['error']
+    for report in summary['reports'][:2]:
+        assert os.path.exists(report['output_path'])
+    assert summary['reports'][0]['output_path'].startswith(os.path.join('out', '001_math-2_'))
+    assert summary['reports_per_minute'] > 0
+    assert '2 succeeded, 1 failed' in report_batch.format_summary(summary)
+
+    with pytest.raises(ValueError):
+        report_batch.plan([{'output_path': 'a.pdf'}, {'output_path': './a.pdf'}], 'out')
@@ -0,0 +1,32 @@
+import report_charts
+from reportlab.graphics.shapes import Drawing
+from reportlab.platypus import Image
+
+QUIZ = {"quiz_questions": [
+    {"question": "What is 1 + 1?", "options": {"a": "1", "b": "2"}, "explanation": "One and one make two."},
+    {"question": "Why is 2 even?", "options": {"a": "It halves", "b": "It is odd"}, "explanation": "It divides by two."},
+]}
+
+
+def test_charts_render_in_memory_for_each_quality():
+    specs = report_charts.chart_specs(QUIZ)
+    assert [s['name'] for s in specs] == ['question_types_chart', 'question_complexity_chart']
+    assert specs[0]['labels'] == ['What', 'Why']
+
+    draft = report_charts.render(specs[0], 'draft')
+    printed = report_charts.render(specs[0], 'print')
+    assert draft['data'].startswith(b'\x89PNG') and len(printed['data']) > len(draft['data'])
+    assert isinstance(report_charts.flowable(draft), Image)
+
+    vector = report_charts.render(specs[1], 'vector')
+    assert isinstance(report_charts.flowable(vector), Drawing)
+
+
+def test_figures_are_reused():
+    pool = report_charts.FigurePool()
+    figure = pool.acquire((8, 6))
+    figure.add_subplot()
+    pool.release(figure, (8, 6))
+    again = pool.acquire((8, 6))
+    assert again is figure and not again.axes
+    assert pool.acquire((8, 6)) is not figure
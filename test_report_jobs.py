@@ -0,0 +1,113 @@
+import json
+import os
+import time
+import quiz_store
+import report_jobs
+
+QUIZ_DATA = {
+    "prompt": "addition",
+    "num_quizzes": 2,
+    "questions": None,
+    "quiz_questions": [
+        {
+            "question": f"What is {i} + {i}?",
+            "options": {"a": "0", "b": str(2 * i), "c": "1", "d": "-1"},
+            "correct": "b",
+            "explanation": "Adding a number to itself doubles it."
+        } for i in (1, 2)
+    ],
+    "timestamp": "2025-01-01T09:00:00"
+}
+
+
+def _wait(job_id, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = report_jobs.get(job_id)
+        if job['status'] in report_jobs.FINISHED_STATES:
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_report_job_runs_in_worker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('quiz_response.json', 'w', encoding='utf-8') as f:
+        json.dump(QUIZ_DATA, f)
+    try:
+        first = report_jobs.submit()
+        second = report_jobs.submit()
+        assert first['status'] in (report_jobs.QUEUED, report_jobs.RUNNING)
+
+        for job in (_wait(first['id']), _wait(second['id'])):
+            assert job['status'] == report_jobs.SUCCEEDED, job['error']
+            assert os.path.exists(job['output_path'])
+        # Each job writes to its own directory
+        assert first['output_path'] != second['output_path']
+        assert report_jobs.latest_succeeded()['id'] in (first['id'], second['id'])
+        assert report_jobs.get('missing') is None
+        assert report_jobs.cancel('missing') is None
+    finally:
+        report_jobs.shutdown()
+
+
+def test_job_inputs_are_snapshotted_and_errors_reported(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    try:
+        try:
+            report_jobs.submit()
+        except report_jobs.MissingInputError:
+            pass
+        else:
+            raise AssertionError('submit() without a quiz should fail')
+
+        with open('quiz_response.json', 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        job = report_jobs.submit()
+        # Rewriting the global quiz after submit must not affect the queued job
+        with open('quiz_response.json', 'w', encoding='utf-8') as f:
+            json.dump(QUIZ_DATA, f)
+
+        job = _wait(job['id'])
+        assert job['status'] == report_jobs.FAILED
+        assert 'Error parsing quiz JSON' in job['error']
+    finally:
+        report_jobs.shutdown()
+
+
+def test_cancel_marks_job_cancelling(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open('quiz_response.json', 'w', encoding='utf-8') as f:
+        json.dump(QUIZ_DATA, f)
+    monkeypatch.setattr(report_jobs, 'MAX_WORKERS', 1)
+    try:
+        running = report_jobs.submit()
+        queued = report_jobs.submit()
+        cancelled = report_jobs.cancel(running['id'])
+        assert cancelled['cancel_requested'] is True
+        assert cancelled['status'] in (report_jobs.CANCELLING, report_jobs.CANCELLED)
+        assert report_jobs.cancel(queued['id'])['status'] in (report_jobs.CANCELLING, report_jobs.CANCELLED)
+        assert _wait(running['id'])['status'] == report_jobs.CANCELLED
+        assert _wait(queued['id'])['status'] == report_jobs.CANCELLED
+        assert not os.path.exists(running['output_path'])
+    finally:
+        report_jobs.shutdown()
+
+
+def test_report_job_uses_stored_quiz(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    quiz_id = quiz_store.save_quiz('addition', 2, None, QUIZ_DATA['quiz_questions'], class_id='math')
+    try:
+        try:
+            report_jobs.submit(quiz_id='missing')
+        except report_jobs.MissingInputError:
+            pass
+        else:
+            raise AssertionError('submit() with an unknown quiz_id should fail')
+
+        job = report_jobs.submit()
+        assert job['quiz_id'] == quiz_id
+        job = _wait(job['id'])
+        assert job['status'] == report_jobs.SUCCEEDED, job['error']
+    finally:
+        report_jobs.shutdown()
@@ -0,0 +1,83 @@
+import threading
+import pytest
+import report_pipeline
+
+
+def test_io_stages_overlap_and_receive_dependency_results():
+    # Both IO stages must be inside slow_io at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def slow_io(name):
+        barrier.wait()
+        return name
+
+    def both(a, b):
+        return a + b
+
+    results, timings = report_pipeline.run_stages([
+        report_pipeline.Stage('a', slow_io, args=('a',)),
+        report_pipeline.Stage('b', slow_io, args=('b',)),
+        report_pipeline.Stage('ab', both, deps=('a', 'b')),
+        report_pipeline.Stage('power', pow, args=(2, 10), kind=report_pipeline.CPU),
+    ])
+
+    assert results['a'] == 'a' and results['b'] == 'b'
+    assert results['ab'] == 'ab'
+    assert results['power'] == 1024
+    assert timings['power'][0] == report_pipeline.CPU
+
+
+def test_cpu_stage_overlaps_io_stage():
+    barrier = threading.Barrier(2, timeout=5)
+    results, _ = report_pipeline.run_stages([
+        report_pipeline.Stage('io', barrier.wait),
+        report_pipeline.Stage('cpu', barrier.wait, kind=report_pipeline.CPU),
+    ])
+    assert results['io'] is not None and results['cpu'] is not None
+
+
+def test_failing_stage_uses_fallback():
+    def boom():
+        raise RuntimeError('no charts today')
+
+    results, _ = report_pipeline.run_stages([
+        report_pipeline.Stage('charts', boom, kind=report_pipeline.CPU, fallback=[]),
+        report_pipeline.Stage('count', len, deps=('charts',)),
+    ])
+    assert results == {'charts': [], 'count': 0}
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        report_pipeline.run_stages([report_pipeline.Stage('a', len, args=('x',), deps=('missing',))])
+
+
+def test_cached_stages_are_reused(tmp_path):
+    import report_cache
+    calls = []
+
+    def draw():
+        calls.append('draw')
+        return [b'png']
+
+    def flaky():
+        calls.append('flaky')
+        raise RuntimeError('Gemini is down')
+
+    def run(key='v1'):
+        cache = report_cache.SectionCache(directory=str(tmp_path / 'cache'))
+        return report_pipeline.run_stages([
+            report_pipeline.Stage('charts', draw, kind=report_pipeline.CPU, cache_key=key),
+            report_pipeline.Stage('ai', flaky, fallback='unavailable', cache_key=key),
+        ], cache=cache)
+
+    run()
+    second, timings = run()
+    assert second['charts'] == [b'png']
+    assert timings['charts'][0] == report_pipeline.CACHED
+    # Failures fall back every time instead of being cached
+    assert second['ai'] == 'unavailable'
+    assert sorted(calls) == ['draw', 'flaky', 'flaky']
+
+    run(key='v2')
+    assert len(calls) == 5
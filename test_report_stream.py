@@ -0,0 +1,33 @@
+import io
+from PIL import Image as PILImage
+from reportlab.platypus import Paragraph, SimpleDocTemplate
+from reportlab.lib.styles import getSampleStyleSheet
+import report_stream
+
+
+def test_story_is_pulled_lazily_with_bounded_lookahead(tmp_path):
+    style = getSampleStyleSheet()['Normal']
+    built = []
+
+    def flowables():
+        for i in range(500):
+            built.append(i)
+            yield Paragraph(f"Paragraph {i}", style)
+
+    story = report_stream.StreamingStory(flowables(), lookahead=8)
+    assert len(built) == 8
+    SimpleDocTemplate(str(tmp_path / 'report.pdf')).build(story)
+    assert len(built) == 500 and story.peak <= 9
+    assert (tmp_path / 'report.pdf').stat().st_size > 0
+
+
+def test_images_are_downsampled_to_display_size():
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (2400, 1800), 'white').save(buffer, format='PNG')
+
+    image = report_stream.embedded_image(buffer.getvalue(), 432, 288, max_dpi=100)
+    assert (image.imageWidth, image.imageHeight) == (600, 400)
+    assert (image.drawWidth, image.drawHeight) == (432, 288)
+    # Small images are never upsampled
+    small = report_stream.embedded_image(buffer.getvalue(), 432, 288, max_dpi=1000)
+    assert (small.imageWidth, small.imageHeight) == (2400, 1800)
@@ -0,0 +1,19 @@
+from reportlab.platypus import SimpleDocTemplate
+import report_styles
+
+
+def test_styles_and_static_sections_are_built_once(tmp_path):
+    assert report_styles.get_styles() is report_styles.get_styles()
+    assert report_styles.get_table_styles()['quiz'] is report_styles.get_table_styles()['quiz']
+
+    first = report_styles.static_section('table_of_contents')
+    second = report_styles.static_section('table_of_contents')
+    assert len(first) == len(report_styles.TOC_ITEMS) + 2
+    # Copies share the parsed text but not layout state
+    assert first[1] is not second[1] and first[1].frags is second[1].frags
+
+    # The same sections lay out in documents of different widths
+    for width, story in ((500, first), (300, second)):
+        doc = SimpleDocTemplate(str(tmp_path / f'{width}.pdf'), pagesize=(width, 800))
+        doc.build(story + report_styles.static_section('recommendations'))
+    assert first[1].width != second[1].width
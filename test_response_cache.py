@@ -0,0 +1,64 @@
+import response_cache
+
+
+def test_hit_miss_and_lru_eviction(tmp_path):
+    cache = response_cache.ResponseCache(str(tmp_path / 'cache.db'), ttl_seconds=3600, max_bytes=10)
+
+    assert cache.get('a') is None
+    cache.set('a', '12345')
+    cache.set('b', '12345')
+    assert cache.get('a') == '12345'
+
+    # 'b' is now least recently used and is evicted to stay under 10 bytes
+    cache.set('c', '12345')
+    assert cache.get('b') is None
+    assert cache.get('a') == '12345'
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['entries'] == 2
+    assert stats['size_bytes'] == 10
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = response_cache.ResponseCache(str(tmp_path / 'cache.db'), ttl_seconds=-1, max_bytes=1000)
+    cache.set('a', 'value')
+    assert cache.get('a') is None
+
+
+def test_make_key_is_stable():
+    assert response_cache.make_key('quiz', 1, 'x') == response_cache.make_key('quiz', 1, 'x')
+    assert response_cache.make_key('quiz', 1, 'x') != response_cache.make_key('quiz', 2, 'x')
+
+
+def test_entries_can_be_dropped_by_tag(tmp_path):
+    cache = response_cache.ResponseCache(str(tmp_path / 'cache.db'), ttl_seconds=3600, max_bytes=1000)
+    cache.set('a', 'one', tag='quiz-1')
+    cache.set('b', 'two', tag='quiz-1')
+    cache.set('c', 'three', tag='quiz-2')
+    assert cache.delete_tag('quiz-1') == 2
+    assert cache.get('a') is None and cache.get('b') is None
+    assert cache.get('c') == 'three'
+
+
+def test_connections_are_closed(tmp_path, monkeypatch):
+    import sqlite3
+    import pytest
+    opened = []
+    connect = sqlite3.connect
+
+    def tracked_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(response_cache.sqlite3, 'connect', tracked_connect)
+
+    cache = response_cache.ResponseCache(str(tmp_path / 'cache.db'), ttl_seconds=3600, max_bytes=1000)
+    cache.set('a', 'value')
+    cache.get('a')
+    cache.stats()
+    assert len(opened) == 4
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
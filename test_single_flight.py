@@ -0,0 +1,41 @@
+import threading
+import time
+import pytest
+import single_flight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = single_flight.SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    threads = [threading.Thread(target=lambda: results.append(flights.do('k', slow, 21))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    while flights.in_flight()['waiters'] < 9:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [21]
+    assert sorted(results) == [(42, False)] + [(42, True)] * 9
+    # Finished calls are not remembered
+    assert flights.do('k', lambda: 'again') == ('again', False)
+
+
+def test_errors_reach_every_waiter():
+    flights = single_flight.SingleFlight()
+
+    def fail():
+        raise ValueError('model unavailable')
+
+    with pytest.raises(ValueError):
+        flights.do('k', fail)
+    assert flights.in_flight() == {'calls': 0, 'waiters': 0}
@@ -0,0 +1,17 @@
+import term_stats
+
+
+def test_tokens_strip_punctuation_stop_words_and_short_words():
+    assert term_stats.tokens("Don't PANIC: the towel, it's useful!") == ['panic', 'towel', 'useful']
+    assert term_stats.tokens(float('nan')) == []
+    assert term_stats.tokens(None) == []
+
+
+def test_counter_updates_incrementally_and_ranks_top_k():
+    counter = term_stats.TermCounter(["gradient descent", "gradient boosting"])
+    assert counter.top(1) == {'gradient': 2}
+    counter.update("boosting boosting trees")
+    assert counter.top(2) == {'boosting': 3, 'gradient': 2}
+    # Equal counts are ordered alphabetically
+    assert list(counter.top(4)) == ['boosting', 'gradient', 'descent', 'trees']
+    assert term_stats.top_terms([], 5) == {}
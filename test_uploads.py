@@ -0,0 +1,25 @@
+import hashlib
+import io
+import os
+import pytest
+from werkzeug.datastructures import FileStorage
+import uploads
+
+
+def test_spool_upload_hashes_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, 'CHUNK_SIZE', 4)
+    payload = b'lecture slides ' * 10
+    upload = uploads.spool_upload(FileStorage(io.BytesIO(payload), 'week1.pdf'), str(tmp_path))
+
+    assert upload.size == len(payload)
+    assert upload.sha256 == hashlib.sha256(payload).hexdigest()
+    assert upload.mime_type == 'application/pdf'
+    assert uploads.model_part(upload) == {'mime_type': 'application/pdf', 'data': payload}
+    upload.remove()
+    assert os.listdir(tmp_path) == []
+
+
+def test_spool_upload_enforces_size_cap(tmp_path):
+    with pytest.raises(uploads.UploadTooLargeError):
+        uploads.spool_upload(FileStorage(io.BytesIO(b'x' * 100), 'big.pdf'), str(tmp_path), max_bytes=10)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,67 @@
+import wordcloud_service
+
+TERMS = {
+    'Questions': {'photosynthesis': 5, 'chlorophyll': 3, 'light': 2},
+    'Explanations': {'energy': 4, 'glucose': 2},
+    'Answer Options': {},
+}
+
+
+def test_clouds_are_rendered_once_and_served_as_bytes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(wordcloud_service, 'WORDCLOUD_CACHE_PATH', str(tmp_path / 'wordclouds.db'))
+    monkeypatch.setattr(wordcloud_service, '_cache', None)
+    settings = {'width': 200, 'height': 100}
+    try:
+        images = wordcloud_service.render_many(TERMS, settings)
+        assert list(images) == ['Questions', 'Explanations']
+        assert all(image.startswith(b'\x89PNG') for image in images.values())
+        assert not list(tmp_path.glob('*.png'))
+
+        rendered = []
+        monkeypatch.setattr(wordcloud_service, 'render_png', lambda *args: rendered.append(args) or b'new')
+        # Same top terms (in any order) and settings: served from the cache
+        again = wordcloud_service.render_many({'Questions': dict(reversed(list(TERMS['Questions'].items())))}, settings)
+        assert again['Questions'] == images['Questions'] and rendered == []
+        # Different settings are a different image
+        wordcloud_service.render_many({'Questions': TERMS['Questions']}, dict(settings, colormap='plasma'))
+        assert len(rendered) == 1
+    finally:
+        wordcloud_service.shutdown()
+
+
+def test_report_section_key_follows_the_render_settings(monkeypatch):
+    import generate_report
+    quiz = {'quiz_questions': [{'question': 'What is photosynthesis?'}]}
+    before = generate_report.section_cache_keys(quiz, 'missing.csv', None)['wordclouds']
+    monkeypatch.setitem(wordcloud_service.WORDCLOUD_SETTINGS, 'colormap', 'plasma')
+    assert generate_report.section_cache_keys(quiz, 'missing.csv', None)['wordclouds'] != before
+
+
+def test_broken_render_pool_is_replaced(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenPool:
+        def __init__(self, fail_on_submit):
+            self.fail_on_submit = fail_on_submit
+
+        def submit(self, *args):
+            if self.fail_on_submit:
+                raise BrokenProcessPool('worker died')
+            future = Future()
+            future.set_exception(BrokenProcessPool('worker died'))
+            return future
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(wordcloud_service, 'WORDCLOUD_CACHE_PATH', str(tmp_path / 'wordclouds.db'))
+    monkeypatch.setattr(wordcloud_service, '_cache', None)
+    monkeypatch.setattr(wordcloud_service, 'render_png', lambda frequencies, settings: b'png')
+    for index, fail_on_submit in enumerate((True, False)):
+        monkeypatch.setattr(wordcloud_service, '_executor', BrokenPool(fail_on_submit))
+        images = wordcloud_service.render_many(TERMS, {'width': 200 + index}, workers=2)
+        # Rendered inline, and the next call gets a fresh pool
+        assert images == {'Questions': b'png', 'Explanations': b'png'}
+        assert wordcloud_service._executor is None
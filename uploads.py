@@ -0,0 +1,115 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+
+# --- SETTINGS ---
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# Files up to this size are sent inline with the request; larger ones go through
+# the Gemini File API (inline request payloads are capped at 20 MB)
+INLINE_LIMIT_BYTES = 15 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Gemini deletes uploaded files after 48 hours; stop reusing them a bit earlier
+REMOTE_FILE_TTL_SECONDS = 46 * 3600
+REMOTE_FILE_ACTIVE_TIMEOUT_SECONDS = 120
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class SpooledUpload:
+    """An upload written to a temporary file, with its size and SHA-256."""
+
+    def __init__(self, path, filename, size, sha256, mime_type):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.mime_type = mime_type
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def guess_mime_type(filename):
+    mime_type, _ = mimetypes.guess_type(filename)
+    return mime_type or 'application/octet-stream'
+
+
+def spool_upload(file_storage, directory, max_bytes=MAX_UPLOAD_BYTES):
+    """Stream an uploaded file to a temporary file in directory, hashing it on the way.
+
+    The upload is read in CHUNK_SIZE pieces, so it is never held in memory whole.
+    Raises UploadTooLargeError (and removes the partial file) past max_bytes.
+    """
+    filename = file_storage.filename
+    suffix = os.path.splitext(filename)[1]
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=suffix, delete=False) as out:
+        try:
+            for chunk in iter(lambda: file_storage.stream.read(CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f'File is larger than {max_bytes // (1024 * 1024)} MB')
+                digest.update(chunk)
+                out.write(chunk)
+        except Exception:
+            out.close()
+            os.remove(out.name)
+            raise
+    return SpooledUpload(out.name, filename, size, digest.hexdigest(), guess_mime_type(filename))
+
+
+# Files already uploaded to Gemini, keyed by SHA-256: {sha256: (file, uploaded_at)}
+_remote_files = {}
+_remote_lock = threading.Lock()
+_upload_locks = {}
+
+
+def _wait_until_active(remote_file):
+    import google.generativeai as genai
+    deadline = time.time() + REMOTE_FILE_ACTIVE_TIMEOUT_SECONDS
+    while remote_file.state.name == 'PROCESSING':
+        if time.time() > deadline:
+            raise TimeoutError(f'Gemini is still processing {remote_file.name}')
+        time.sleep(1)
+        remote_file = genai.get_file(remote_file.name)
+    if remote_file.state.name != 'ACTIVE':
+        raise RuntimeError(f'Gemini could not process {remote_file.name} ({remote_file.state.name})')
+    return remote_file
+
+
+def remote_file(upload):
+    """Upload a file through the Gemini File API once per SHA-256 and reuse the handle."""
+    with _remote_lock:
+        cached = _remote_files.get(upload.sha256)
+        if cached and time.time() - cached[1] < REMOTE_FILE_TTL_SECONDS:
+            return cached[0]
+        key_lock = _upload_locks.setdefault(upload.sha256, threading.Lock())
+    # One upload per file even when concurrent requests (or quiz shards) need it
+    with key_lock:
+        with _remote_lock:
+            cached = _remote_files.get(upload.sha256)
+            if cached and time.time() - cached[1] < REMOTE_FILE_TTL_SECONDS:
+                return cached[0]
+        print(f"Uploading {upload.filename} ({upload.size} bytes) to Gemini File API")
+        import google.generativeai as genai  # deferred: slow to import
+        uploaded = _wait_until_active(genai.upload_file(upload.path, mime_type=upload.mime_type,
+                                                        display_name=upload.filename))
+        with _remote_lock:
+            _remote_files[upload.sha256] = (uploaded, time.time())
+            _upload_locks.pop(upload.sha256, None)
+        return uploaded
+
+
+def model_part(upload):
+    """Content part for generate_content: inline bytes for small files, a File API handle for large ones."""
+    if upload.size > INLINE_LIMIT_BYTES:
+        return remote_file(upload)
+    with open(upload.path, 'rb') as f:
+        return {"mime_type": upload.mime_type, "data": f.read()}
@@ -0,0 +1,134 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import response_cache
+
+# --- SETTINGS ---
+WORDCLOUD_CACHE_PATH = os.path.join('cache', 'wordclouds.db')
+WORDCLOUD_CACHE_TTL_SECONDS = 30 * 24 * 3600
+WORDCLOUD_CACHE_MAX_BYTES = 128 * 1024 * 1024
+WORDCLOUD_SETTINGS = {
+    'width': 800,
+    'height': 400,
+    'background_color': 'white',
+    'colormap': 'viridis',
+    'max_words': 30,
+}
+# Processes rendering cache misses; each cloud takes about a second of CPU
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+_cache = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_cache():
+    """Open the word-cloud cache on first use."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = response_cache.ResponseCache(
+                WORDCLOUD_CACHE_PATH, WORDCLOUD_CACHE_TTL_SECONDS, WORDCLOUD_CACHE_MAX_BYTES
+            )
+        return _cache
+
+
+def _get_executor():
+    """Create the render pool on first use ('spawn', like report_jobs, to stay clear of threads)."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def _drop_executor(executor):
+    """Forget a pool that lost a worker (e.g. OOM-killed) so the next call starts a fresh one."""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def top_terms(frequencies, k):
+    """The k most frequent terms, ties broken alphabetically (only these appear in the cloud)."""
+    return sorted(frequencies.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def cache_key(frequencies, settings):
+    """Key for one rendered cloud: its top-k terms and counts plus the render settings."""
+    return response_cache.make_key('wordcloud', top_terms(frequencies, settings['max_words']), settings)
+
+
+def render_png(frequencies, settings):
+    """PNG bytes of one word cloud (runs in the render pool)."""
+    from wordcloud import WordCloud
+    cloud = WordCloud(**settings).generate_from_frequencies(dict(top_terms(frequencies, settings['max_words'])))
+    buffer = io.BytesIO()
+    cloud.to_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_many(frequencies_by_name, settings=None, workers=None):
+    """PNG bytes for each {name: term frequencies}, from the cache where possible.
+
+    Misses are rendered in parallel on the process pool, or inline when there is
+    only one or workers is 1. Names whose cloud can't be rendered are left out.
+    """
+    settings = dict(WORDCLOUD_SETTINGS, **(settings or {}))
+    workers = RENDER_WORKERS if workers is None else workers
+    cache = get_cache()
+    images, misses = {}, {}
+    for name, frequencies in frequencies_by_name.items():
+        if not frequencies:
+            continue
+        key = cache_key(frequencies, settings)
+        image = cache.get(key)
+        if image is not None:
+            images[name] = image
+        else:
+            misses[name] = (key, frequencies)
+
+    futures = {}
+    if len(misses) > 1 and workers > 1:
+        executor = _get_executor()
+        try:
+            for name, (_, frequencies) in misses.items():
+                futures[name] = executor.submit(render_png, frequencies, settings)
+        except BrokenProcessPool:
+            print("WARNING: Word cloud render pool was broken, rendering inline")
+            _drop_executor(executor)
+            futures = {}
+    for name, (key, frequencies) in misses.items():
+        try:
+            try:
+                image = futures[name].result() if name in futures else render_png(frequencies, settings)
+            except BrokenProcessPool:
+                # The pool died under this render: finish the remaining clouds inline
+                print("WARNING: Word cloud render pool was broken, rendering inline")
+                _drop_executor(executor)
+                futures = {}
+                image = render_png(frequencies, settings)
+        except Exception as e:
+            print(f"WARNING: Could not generate word cloud for {name}: {e}")
+            continue
+        cache.set(key, image)
+        images[name] = image
+    # Keep the caller's order
+    return {name: images[name] for name in frequencies_by_name if name in images}
+
+
+def shutdown():
+    """Stop the render pool, if it was started."""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None